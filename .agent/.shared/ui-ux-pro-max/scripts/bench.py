@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Bench - latency and memory benchmarks for search and design-system generation
+
+Usage:
+    python bench.py                                   # all scales, print report
+    python bench.py --scales 1,10 --output bench.json # save results (use as a baseline later)
+    python bench.py --baseline bench.json --threshold 0.25
+    python bench.py startup                           # import-time budget for search.py
+    python bench.py startup --output startup.json     # record this machine's import time
+    python bench.py startup --baseline startup.json   # fail when it grows past the recording
+
+States:
+    cold  - no on-disk cache, nothing in memory (parse + fit + score)
+    disk  - on-disk index cache present, nothing in memory
+    warm  - indexes already loaded in this process, result cache cleared before each run
+    cached - the same queries again, answered from the result cache
+
+Backends: every scale also times uncached core.search / core.search_stack
+(pure-Python BM25, result cache cleared before each run) against the same
+queries on the SQLite FTS5 backend (fts.py), when sqlite3 has FTS5, and
+prints the p50 ratio per corpus.
+
+Scales replicate every CSV row N times (with shuffled words) in a temporary
+data directory. With --baseline, the run fails (exit 1) when any p95 grows by
+more than --threshold (relative) and --min-delta-ms (absolute).
+
+The startup check runs search.py under `python -X importtime` and fails when the
+modules imported for a one-shot query take longer than --budget-ms in total
+(default 40 ms; search.py currently needs about 30 ms). Import times differ between
+machines, so CI should record a baseline once and compare against it; an eager
+design-system import adds 4-6 ms, which --threshold 0.1 catches.
+"""
+
+import argparse
+import csv
+import io
+import json
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import core
+import fts
+
+
+# ============ CONFIGURATION ============
+DEFAULT_SCALES = [1, 10, 100]
+QUERY_LENGTHS = {"short": 1, "medium": 3, "long": 8}
+STARTUP_BUDGET_MS = 40
+STARTUP_THRESHOLD = 0.1
+STARTUP_ARGS = ["glassmorphism", "--domain", "style", "--no-daemon"]
+DESIGN_QUERIES = ["SaaS dashboard", "beauty spa wellness service", "fintech crypto exchange", "automotive repair workshop admin"]
+SEED = 40
+
+
+# ============ HELPERS ============
+def summarize(samples, peak_bytes):
+    """Latency percentiles (ms) and peak traced memory (KiB) for one scenario"""
+    return {
+        "n": len(samples),
+        "p50_ms": round(core.percentile(samples, 50), 4),
+        "p95_ms": round(core.percentile(samples, 95), 4),
+        "p99_ms": round(core.percentile(samples, 99), 4),
+        "peak_kib": round(peak_bytes / 1024, 1)
+    }
+
+
+def reset_memory():
+    """Forget every in-process index so the next query reloads from disk"""
+    core._INDEXES.clear()
+    core._FEDERATED.clear()
+    core._SNAPSHOT.clear()
+    core._RESULTS.clear()
+    fts.close()
+
+
+def reset_disk():
+    """Delete the on-disk index cache"""
+    shutil.rmtree(core.CACHE_DIR, ignore_errors=True)
+
+
+def enlarge(source_dir, target_dir, factor, rng):
+    """Copy the data directory, repeating every CSV row factor times with shuffled words"""
+    for path in source_dir.rglob("*.csv"):
+        target = target_dir / path.relative_to(source_dir)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            rows = list(csv.reader(f))
+        out = io.StringIO()
+        writer = csv.writer(out)
+        writer.writerow(rows[0])
+        for copy in range(factor):
+            for row in rows[1:]:
+                if copy == 0:
+                    writer.writerow(row)
+                    continue
+                mutated = []
+                for cell in row:
+                    words = cell.split(" ")
+                    rng.shuffle(words)
+                    mutated.append(" ".join(words))
+                writer.writerow(mutated)
+        target.write_text(out.getvalue(), encoding='utf-8')
+
+
+def make_queries(vocabulary, rng, count=5):
+    """Deterministic queries of each length drawn from a corpus vocabulary"""
+    terms = sorted(vocabulary) or ["design"]
+    return {
+        name: [" ".join(rng.choice(terms) for _ in range(length)) for _ in range(count)]
+        for name, length in QUERY_LENGTHS.items()
+    }
+
+
+def measure(run, repeat, before=None):
+    """Time run() repeat times (calling before() untimed first), then trace one extra run for peak memory"""
+    samples = []
+    for _ in range(repeat):
+        if before:
+            before()
+        start = time.perf_counter()
+        run()
+        samples.append((time.perf_counter() - start) * 1000)
+
+    if before:
+        before()
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return summarize(samples, peak)
+
+
+# ============ SCENARIOS ============
+def bench_search(results, scale, repeat, cold_repeat, rng):
+    """core.search per domain and core.search_stack per stack, in every cache state"""
+    targets = [(f"search/{name}", config, lambda q, d=name: core.search(q, d))
+               for name, config in core.CSV_CONFIG.items()]
+    targets += [(f"search_stack/{name}", dict(config, **core._STACK_COLS), lambda q, s=name: core.search_stack(q, s))
+                for name, config in core.STACK_CONFIG.items()]
+
+    for label, config, call in targets:
+        filepath = core.DATA_DIR / config["file"]
+        if not filepath.exists():
+            continue
+        index = core.load_index(filepath, config["search_cols"])
+        queries = make_queries(index.bm25.vocab, rng)
+
+        for length, batch in queries.items():
+            def run(batch=batch, call=call):
+                for query in batch:
+                    call(query)
+
+            def cold():
+                reset_memory()
+                reset_disk()
+
+            key = f"scale={scale}/{label}/{length}"
+            results[f"{key}/cold"] = measure(run, cold_repeat, cold)
+            results[f"{key}/disk"] = measure(run, cold_repeat, reset_memory)
+            run()
+            results[f"{key}/warm"] = measure(run, repeat, core._RESULTS.clear)
+            results[f"{key}/cached"] = measure(run, repeat)
+
+
+def bench_backends(results, scale, repeat, cold_repeat, rng):
+    """Pure-Python BM25 (result cache cleared) against the FTS5 backend, on the same queries"""
+    path = core.CACHE_DIR / "bench.fts"
+
+    def fresh():
+        fts.close()
+        for suffix in ("", "-wal", "-shm"):
+            Path(f"{path}{suffix}").unlink(missing_ok=True)
+
+    results[f"scale={scale}/fts.build/cold"] = measure(lambda: fts.build(path), cold_repeat, fresh)
+    fts.build(path)
+
+    targets = [(f"search/{name}", config, lambda q, d=name: core.search(q, d),
+                lambda q, d=name: fts.search(q, d, path=path))
+               for name, config in core.CSV_CONFIG.items()]
+    targets += [(f"search_stack/{name}", dict(config, **core._STACK_COLS), lambda q, s=name: core.search_stack(q, s),
+                 lambda q, s=name: fts.search_stack(q, s, path=path))
+                for name, config in core.STACK_CONFIG.items()]
+
+    for label, config, python_call, fts_call in targets:
+        filepath = core.DATA_DIR / config["file"]
+        if not filepath.exists():
+            continue
+        index = core.load_index(filepath, config["search_cols"])
+        for length, batch in make_queries(index.bm25.vocab, rng).items():
+            key = f"scale={scale}/backend/{label}/{length}"
+            for backend, call, before in (("python", python_call, core._RESULTS.clear), ("fts", fts_call, None)):
+                def run(batch=batch, call=call):
+                    for query in batch:
+                        call(query)
+
+                run()
+                results[f"{key}/{backend}"] = measure(run, repeat, before)
+
+
+def compare_backends(results):
+    """Lines comparing the python and fts p50 of every backend scenario"""
+    lines = []
+    for key, stats in results.items():
+        if "/backend/" not in key or not key.endswith("/python"):
+            continue
+        other = results.get(key[:-len("python")] + "fts")
+        if other:
+            ratio = stats["p50_ms"] / other["p50_ms"] if other["p50_ms"] else float("inf")
+            lines.append(f"{key[:-len('/python')]:<60} python {stats['p50_ms']:>8.3f}  fts {other['p50_ms']:>8.3f}  x{ratio:.2f}")
+    return lines
+
+
+def bench_design_system(results, scale, repeat, cold_repeat):
+    """DesignSystemGenerator.generate and persist_design_system"""
+    from design_system import DesignSystemGenerator, persist_design_system
+
+    def generate():
+        generator = DesignSystemGenerator()
+        return [generator.generate(query, "Bench") for query in DESIGN_QUERIES]
+
+    def cold():
+        reset_memory()
+        reset_disk()
+
+    key = f"scale={scale}/design_system.generate"
+    results[f"{key}/cold"] = measure(generate, cold_repeat, cold)
+    generate()
+    results[f"{key}/warm"] = measure(generate, repeat, core._RESULTS.clear)
+    results[f"{key}/cached"] = measure(generate, repeat)
+
+    systems = generate()
+    with tempfile.TemporaryDirectory() as out:
+        def persist():
+            for system, query in zip(systems, DESIGN_QUERIES):
+                persist_design_system(system, "dashboard", out, query)
+
+        persist()
+        results[f"scale={scale}/persist_design_system/warm"] = measure(persist, repeat)
+
+
+def run_benchmarks(scales, repeat, cold_repeat):
+    """Run every scenario at every scale against temporary data and cache dirs"""
+    original_data, original_cache = core.DATA_DIR, core.CACHE_DIR
+    results = {}
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            core.CACHE_DIR = Path(tmp) / "cache"
+            for scale in scales:
+                rng = random.Random(SEED + scale)
+                if scale == 1:
+                    core.DATA_DIR = original_data
+                else:
+                    core.DATA_DIR = Path(tmp) / f"data-x{scale}"
+                    enlarge(original_data, core.DATA_DIR, scale, rng)
+                reset_memory()
+                reset_disk()
+                print(f"scale x{scale} ...", file=sys.stderr, flush=True)
+                bench_search(results, scale, repeat, cold_repeat, rng)
+                if fts.available():
+                    bench_backends(results, scale, repeat, cold_repeat, rng)
+                bench_design_system(results, scale, repeat, cold_repeat)
+    finally:
+        core.DATA_DIR, core.CACHE_DIR = original_data, original_cache
+        reset_memory()
+    return results
+
+
+# ============ STARTUP ============
+def import_times(args, repeat):
+    """Best-of-repeat cumulative import time (ms) per top-level module of a search.py run"""
+    script = Path(__file__).with_name("search.py")
+    best = {}
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, "-X", "importtime", str(script)] + args,
+                              capture_output=True, text=True, check=True)
+        for line in proc.stderr.splitlines():
+            if not line.startswith("import time:") or "cumulative" in line:
+                continue
+            _, cumulative, name = line[len("import time:"):].split("|", 2)
+            name = name[1:]
+            if name.startswith(" "):
+                continue  # nested import, already counted by its parent
+            ms = int(cumulative) / 1000
+            best[name] = min(ms, best.get(name, ms))
+    return best
+
+
+def check_startup(argv=None):
+    """Fail when search.py imports more than the startup budget allows"""
+    parser = argparse.ArgumentParser(prog="bench.py startup", description="search.py import-time budget")
+    parser.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS, help=f"Allowed total import time (default: {STARTUP_BUDGET_MS})")
+    parser.add_argument("--repeat", type=int, default=10, help="Runs to take the best time per module from (default: 10)")
+    parser.add_argument("--top", type=int, default=10, help="Slowest modules to list (default: 10)")
+    parser.add_argument("--output", "-o", type=str, default=None, help="Write the import times as JSON (usable as a baseline)")
+    parser.add_argument("--baseline", type=str, default=None, help="Startup JSON to compare the total against")
+    parser.add_argument("--threshold", type=float, default=STARTUP_THRESHOLD, help=f"Allowed relative growth over the baseline (default: {STARTUP_THRESHOLD})")
+    args = parser.parse_args(argv)
+
+    times = import_times(STARTUP_ARGS, args.repeat)
+    total = sum(times.values())
+    for name, ms in sorted(times.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{name:<40} {ms:>9.2f} ms")
+    print(f"{'total':<40} {total:>9.2f} ms (budget {args.budget_ms:.0f} ms)")
+
+    if args.output:
+        payload = {
+            "meta": {"python": platform.python_version(), "platform": platform.platform()},
+            "total_ms": round(total, 3),
+            "modules": {name: round(ms, 3) for name, ms in times.items()}
+        }
+        Path(args.output).write_text(json.dumps(payload, indent=2), encoding='utf-8')
+
+    status = 0
+    if total > args.budget_ms:
+        print(f"REGRESSION startup: {total:.2f} ms > {args.budget_ms:.0f} ms", file=sys.stderr)
+        status = 1
+    if args.baseline:
+        before = json.loads(Path(args.baseline).read_text(encoding='utf-8'))["total_ms"]
+        if total > before * (1 + args.threshold):
+            print(f"REGRESSION startup: {before:.2f} ms -> {total:.2f} ms", file=sys.stderr)
+            status = 1
+    return status
+
+
+# ============ REPORTING ============
+def compare(results, baseline, threshold, min_delta_ms):
+    """Scenarios whose p95 regressed past the threshold"""
+    regressions = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if not previous:
+            continue
+        delta = current["p95_ms"] - previous["p95_ms"]
+        if delta > min_delta_ms and delta > threshold * previous["p95_ms"]:
+            regressions.append((key, previous["p95_ms"], current["p95_ms"]))
+    return regressions
+
+
+def format_report(results):
+    """Plain-text table, one scenario per line"""
+    lines = [f"{'scenario':<70} {'p50':>9} {'p95':>9} {'p99':>9} {'peak KiB':>10}"]
+    for key, stats in results.items():
+        lines.append(f"{key:<70} {stats['p50_ms']:>9.3f} {stats['p95_ms']:>9.3f} {stats['p99_ms']:>9.3f} {stats['peak_kib']:>10.1f}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["startup"]:
+        return check_startup(argv[1:])
+
+    parser = argparse.ArgumentParser(description="UI Pro Max Benchmarks")
+    parser.add_argument("--scales", type=str, default=",".join(map(str, DEFAULT_SCALES)), help="Corpus size multipliers (default: 1,10,100)")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed runs per warm scenario (default: 20)")
+    parser.add_argument("--cold-repeat", type=int, default=5, help="Timed runs per cold/disk scenario (default: 5)")
+    parser.add_argument("--output", "-o", type=str, default=None, help="Write results as JSON (usable as a baseline)")
+    parser.add_argument("--baseline", type=str, default=None, help="Baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed relative p95 growth (default: 0.25)")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="Ignore p95 growth below this many ms (default: 1.0)")
+    args = parser.parse_args(argv)
+
+    scales = [int(s) for s in args.scales.split(",") if s.strip()]
+    results = run_benchmarks(scales, args.repeat, args.cold_repeat)
+    print(format_report(results))
+    comparison = compare_backends(results)
+    if comparison:
+        print("\nPython BM25 vs SQLite FTS5 (p50 ms per batch of queries):")
+        print("\n".join(comparison))
+
+    if args.output:
+        payload = {
+            "meta": {"python": platform.python_version(), "platform": platform.platform(), "scales": scales},
+            "results": results
+        }
+        Path(args.output).write_text(json.dumps(payload, indent=2), encoding='utf-8')
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding='utf-8')).get("results", {})
+        regressions = compare(results, baseline, args.threshold, args.min_delta_ms)
+        for key, before, after in regressions:
+            print(f"REGRESSION {key}: p95 {before:.3f} ms -> {after:.3f} ms", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,71 +4,112 @@
 UI/UX Pro Max Core - BM25 search engine for UI/UX style guides
 """
 
-import csv
+import heapq
+import io
+import os
+import pickle
 import re
+import sys
+import threading
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
 from pathlib import Path
 from math import log
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
 
 # ============ CONFIGURATION ============
 DATA_DIR = Path(__file__).parent.parent / "data"
+CACHE_DIR = Path(os.environ.get("UIPRO_CACHE_DIR", Path(__file__).parent.parent / ".cache"))
 MAX_RESULTS = 3
+MAX_SUGGESTIONS = 8
+RESULT_CACHE_SIZE = 1024
+SEARCH_MODES = ("bm25", "dense", "hybrid")
+INDEX_VERSION = 5
+PROXIMITY_WINDOW = 3
+PROXIMITY_BOOST = 0.5
+DEDUPE_FANOUT = 4
+
+# Ranking and tokenizer settings; a corpus config may override them with a
+# "bm25" entry (see evaluate.py for tuning them against labeled queries).
+# field_weights switches a corpus to BM25F: {search column: weight}, 1.0 for
+# columns not listed. No corpus sets them yet: the labeled queries in ../eval
+# are too few to tell a real gain from fitting those queries.
+BM25_DEFAULTS = {"k1": 1.5, "b": 0.75, "min_len": 3, "stopwords": [], "field_weights": {}}
 
 CSV_CONFIG = {
     "style": {
         "file": "styles.csv",
         "search_cols": ["Style Category", "Keywords", "Best For", "Type"],
-        "output_cols": ["Style Category", "Type", "Keywords", "Primary Colors", "Effects & Animation", "Best For", "Performance", "Accessibility", "Framework Compatibility", "Complexity"]
+        "output_cols": ["Style Category", "Type", "Keywords", "Primary Colors", "Effects & Animation", "Best For", "Performance", "Accessibility", "Framework Compatibility", "Complexity"],
+        "facet_cols": ["Type"],
+        "name_col": "Style Category"
     },
     "prompt": {
         "file": "prompts.csv",
         "search_cols": ["Style Category", "AI Prompt Keywords (Copy-Paste Ready)", "CSS/Technical Keywords"],
-        "output_cols": ["Style Category", "AI Prompt Keywords (Copy-Paste Ready)", "CSS/Technical Keywords", "Implementation Checklist"]
+        "output_cols": ["Style Category", "AI Prompt Keywords (Copy-Paste Ready)", "CSS/Technical Keywords", "Implementation Checklist"],
+        "name_col": "Style Category"
     },
     "color": {
         "file": "colors.csv",
         "search_cols": ["Product Type", "Keywords", "Notes"],
-        "output_cols": ["Product Type", "Keywords", "Primary (Hex)", "Secondary (Hex)", "CTA (Hex)", "Background (Hex)", "Text (Hex)", "Border (Hex)", "Notes"]
+        "output_cols": ["Product Type", "Keywords", "Primary (Hex)", "Secondary (Hex)", "CTA (Hex)", "Background (Hex)", "Text (Hex)", "Border (Hex)", "Notes"],
+        "name_col": "Product Type"
     },
     "chart": {
         "file": "charts.csv",
         "search_cols": ["Data Type", "Keywords", "Best Chart Type", "Accessibility Notes"],
-        "output_cols": ["Data Type", "Keywords", "Best Chart Type", "Secondary Options", "Color Guidance", "Accessibility Notes", "Library Recommendation", "Interactive Level"]
+        "output_cols": ["Data Type", "Keywords", "Best Chart Type", "Secondary Options", "Color Guidance", "Accessibility Notes", "Library Recommendation", "Interactive Level"],
+        "name_col": "Data Type"
     },
     "landing": {
         "file": "landing.csv",
         "search_cols": ["Pattern Name", "Keywords", "Conversion Optimization", "Section Order"],
-        "output_cols": ["Pattern Name", "Keywords", "Section Order", "Primary CTA Placement", "Color Strategy", "Conversion Optimization"]
+        "output_cols": ["Pattern Name", "Keywords", "Section Order", "Primary CTA Placement", "Color Strategy", "Conversion Optimization"],
+        "name_col": "Pattern Name"
     },
     "product": {
         "file": "products.csv",
         "search_cols": ["Product Type", "Keywords", "Primary Style Recommendation", "Key Considerations"],
-        "output_cols": ["Product Type", "Keywords", "Primary Style Recommendation", "Secondary Styles", "Landing Page Pattern", "Dashboard Style (if applicable)", "Color Palette Focus"]
+        "output_cols": ["Product Type", "Keywords", "Primary Style Recommendation", "Secondary Styles", "Landing Page Pattern", "Dashboard Style (if applicable)", "Color Palette Focus"],
+        "name_col": "Product Type"
     },
     "ux": {
         "file": "ux-guidelines.csv",
         "search_cols": ["Category", "Issue", "Description", "Platform"],
-        "output_cols": ["Category", "Issue", "Platform", "Description", "Do", "Don't", "Code Example Good", "Code Example Bad", "Severity"]
+        "output_cols": ["Category", "Issue", "Platform", "Description", "Do", "Don't", "Code Example Good", "Code Example Bad", "Severity"],
+        "facet_cols": ["Category", "Platform", "Severity"],
+        "name_col": "Issue"
     },
     "typography": {
         "file": "typography.csv",
         "search_cols": ["Font Pairing Name", "Category", "Mood/Style Keywords", "Best For", "Heading Font", "Body Font"],
-        "output_cols": ["Font Pairing Name", "Category", "Heading Font", "Body Font", "Mood/Style Keywords", "Best For", "Google Fonts URL", "CSS Import", "Tailwind Config", "Notes"]
+        "output_cols": ["Font Pairing Name", "Category", "Heading Font", "Body Font", "Mood/Style Keywords", "Best For", "Google Fonts URL", "CSS Import", "Tailwind Config", "Notes"],
+        "facet_cols": ["Category"],
+        "name_col": "Font Pairing Name"
     },
     "icons": {
         "file": "icons.csv",
         "search_cols": ["Category", "Icon Name", "Keywords", "Best For"],
-        "output_cols": ["Category", "Icon Name", "Keywords", "Library", "Import Code", "Usage", "Best For", "Style"]
+        "output_cols": ["Category", "Icon Name", "Keywords", "Library", "Import Code", "Usage", "Best For", "Style"],
+        "facet_cols": ["Category", "Library", "Style"],
+        "name_col": "Icon Name"
     },
     "react": {
         "file": "react-performance.csv",
         "search_cols": ["Category", "Issue", "Keywords", "Description"],
-        "output_cols": ["Category", "Issue", "Platform", "Description", "Do", "Don't", "Code Example Good", "Code Example Bad", "Severity"]
+        "output_cols": ["Category", "Issue", "Platform", "Description", "Do", "Don't", "Code Example Good", "Code Example Bad", "Severity"],
+        "facet_cols": ["Category", "Platform", "Severity"],
+        "name_col": "Issue"
     },
     "web": {
         "file": "web-interface.csv",
         "search_cols": ["Category", "Issue", "Keywords", "Description"],
-        "output_cols": ["Category", "Issue", "Platform", "Description", "Do", "Don't", "Code Example Good", "Code Example Bad", "Severity"]
+        "output_cols": ["Category", "Issue", "Platform", "Description", "Do", "Don't", "Code Example Good", "Code Example Bad", "Severity"],
+        "facet_cols": ["Category", "Platform", "Severity"],
+        "name_col": "Issue"
     }
 }
 
@@ -90,105 +131,1178 @@ STACK_CONFIG = {
 # Common columns for all stacks
 _STACK_COLS = {
     "search_cols": ["Category", "Guideline", "Description", "Do", "Don't"],
-    "output_cols": ["Category", "Guideline", "Description", "Do", "Don't", "Code Good", "Code Bad", "Severity", "Docs URL"]
+    "output_cols": ["Category", "Guideline", "Description", "Do", "Don't", "Code Good", "Code Bad", "Severity", "Docs URL"],
+    "facet_cols": ["Category", "Severity"],
+    "name_col": "Guideline"
 }
 
 AVAILABLE_STACKS = list(STACK_CONFIG.keys())
 
 
+# ============ TOKENIZER ============
+class Tokenizer:
+    """Lowercase, strip punctuation, drop short words and stopwords; memoized and interned"""
+
+    PUNCTUATION = re.compile(r'[^\w\s]')
+    WORD = re.compile(r'\w+')
+    PHRASE = re.compile(r'"([^"]+)"')
+
+    def __init__(self, min_len=3, stopwords=(), cache_size=4096):
+        self.min_len = min_len
+        self.stopwords = frozenset(stopwords)
+        self._cached = lru_cache(maxsize=cache_size)(self._tokenize)
+
+    def __call__(self, text):
+        """Token tuple for text; repeated strings are served from the LRU cache"""
+        return self._cached(str(text))
+
+    def _tokenize(self, text):
+        words = self.PUNCTUATION.sub(' ', text.lower()).split()
+        return tuple(sys.intern(w) for w in words if len(w) >= self.min_len and w not in self.stopwords)
+
+    def phrases(self, text):
+        """Token tuples of the double-quoted phrases in a query"""
+        return [tokens for tokens in (self(phrase) for phrase in self.PHRASE.findall(text)) if tokens]
+
+    def config(self):
+        """Settings that change the token stream, stored alongside fitted indexes"""
+        return {"min_len": self.min_len, "stopwords": sorted(self.stopwords)}
+
+    @classmethod
+    def from_config(cls, config):
+        """Tokenizer with the settings returned by config()"""
+        return cls(config.get("min_len", 3), config.get("stopwords", ()))
+
+
+DEFAULT_TOKENIZER = Tokenizer()
+_TOKENIZERS = {}
+
+
+def tokenizer_for(min_len=3, stopwords=()):
+    """Shared Tokenizer instance for a setting, so its LRU cache is reused"""
+    key = (min_len, tuple(sorted(stopwords)))
+    if key == (DEFAULT_TOKENIZER.min_len, ()):
+        return DEFAULT_TOKENIZER
+    if key not in _TOKENIZERS:
+        _TOKENIZERS[key] = Tokenizer(min_len, stopwords)
+    return _TOKENIZERS[key]
+
+
+# ============ TYPO TOLERANCE ============
+def _trigrams(term):
+    """Character trigrams of a term padded with boundary markers"""
+    padded = f"${term}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _edit_distance(a, b, limit):
+    """Levenshtein distance, or limit + 1 as soon as it must exceed limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class TrigramIndex:
+    """Character-trigram index over a vocabulary for typo correction
+
+    Candidates are the terms sharing the most trigrams with the unknown token
+    (Dice coefficient); only the few best are checked with a bounded edit
+    distance, so there is no scan over the whole vocabulary.
+    """
+
+    MIN_LEN = 6
+    MIN_DICE = 0.5
+    CANDIDATES = 8
+
+    def __init__(self, terms):
+        self.terms = list(terms)
+        self.sizes = array('H', (len(_trigrams(term)) for term in self.terms))
+        grams = defaultdict(lambda: array('I'))
+        for tid, term in enumerate(self.terms):
+            for gram in _trigrams(term):
+                grams[gram].append(tid)
+        self.grams = dict(grams)
+
+    def closest(self, token):
+        """Best vocabulary term for an unknown token, or None"""
+        if len(token) < self.MIN_LEN:
+            return None
+        query = _trigrams(token)
+        overlap = defaultdict(int)
+        for gram in query:
+            for tid in self.grams.get(gram, ()):
+                overlap[tid] += 1
+
+        dice = ((2 * shared / (len(query) + self.sizes[tid]), tid) for tid, shared in overlap.items())
+        limit = 1 if len(token) < 10 else 2
+        best = None
+        for coefficient, tid in heapq.nlargest(self.CANDIDATES, dice):
+            if coefficient < self.MIN_DICE:
+                break
+            distance = _edit_distance(token, self.terms[tid], limit)
+            if distance <= limit and (best is None or distance < best[0]):
+                best = (distance, tid)
+        return self.terms[best[1]] if best else None
+
+
+def _correct(tokenizer, vocab, trigrams, query):
+    """Rewrite unknown query tokens to their closest vocabulary terms"""
+    corrections = {}
+    tokens = tokenizer(query)
+    for token in tokens:
+        if token not in vocab and token not in corrections:
+            match = trigrams().closest(token)
+            if match:
+                corrections[token] = match
+    if not corrections:
+        return query, {}
+    # Substitute in place so quoted phrases keep their quotes
+    fixed = tokenizer.WORD.sub(lambda m: corrections.get(m.group().lower(), m.group()), query)
+    return fixed, corrections
+
+
+# ============ AUTOCOMPLETE ============
+class PrefixIndex:
+    """Sorted-key prefix index over row names and vocabulary terms
+
+    Every suggestion gets a rank when the index is built (names alphabetically,
+    then terms by document frequency), and each name is also keyed from every
+    word it contains, so "ui" finds "Soft UI Evolution" and "crypto" finds
+    "Fintech/Crypto". A lookup bisects the sorted keys
+    and ranks the matching slice; prefixes of up to SHORT characters, whose
+    slices are the longest, are answered from a table built up front.
+    """
+
+    SHORT = 2
+    DEPTH = 32
+
+    def __init__(self, names, terms, frequencies):
+        suggestions = {}
+        for name in names:
+            name = " ".join(name.split())
+            if name:
+                suggestions.setdefault(name.lower(), (0, 0, name, "name"))
+        for term, frequency in zip(terms, frequencies):
+            suggestions.setdefault(term, (1, -frequency, term, "term"))
+        ranked = sorted(suggestions.values())
+        self.texts = [text for _, _, text, _ in ranked]
+        self.kinds = [kind for _, _, _, kind in ranked]
+
+        entries = []
+        for rank, text in enumerate(self.texts):
+            lowered = text.lower()
+            entries.extend((lowered[word.start():], rank) for word in Tokenizer.WORD.finditer(lowered))
+        entries.sort()
+        self.keys = [key for key, _ in entries]
+        self.ranks = array('I', (rank for _, rank in entries))
+
+        self.short = {}
+        for length in range(1, self.SHORT + 1):
+            for prefix in {key[:length] for key in self.keys if len(key) >= length}:
+                self.short[prefix] = self._scan(prefix, self.DEPTH)
+
+    def _scan(self, prefix, k):
+        """Best k distinct ranks among the keys starting with prefix"""
+        lo = bisect_left(self.keys, prefix)
+        hi = bisect_left(self.keys, prefix + "\U0010ffff", lo)
+        return sorted(set(self.ranks[lo:hi]))[:k]
+
+    def lookup(self, prefix, k):
+        """[(text, kind)] of the best k suggestions for a lowercased prefix"""
+        if len(prefix) <= self.SHORT and k <= self.DEPTH:
+            ranks = self.short.get(prefix, ())[:k]
+        else:
+            ranks = self._scan(prefix, k)
+        return [(self.texts[rank], self.kinds[rank]) for rank in ranks]
+
+
 # ============ BM25 IMPLEMENTATION ============
+def _merge_shifted(starts, positions, shift):
+    """Sorted starts s for which s + shift is in positions (two-pointer merge)"""
+    out = []
+    i = j = 0
+    while i < len(starts) and j < len(positions):
+        target = starts[i] + shift
+        if positions[j] < target:
+            j += 1
+        elif positions[j] > target:
+            i += 1
+        else:
+            out.append(starts[i])
+            i += 1
+            j += 1
+    return out
+
+
+def _min_gap(a, b):
+    """Smallest |x - y| over two sorted position lists (two-pointer merge)"""
+    best = None
+    i = j = 0
+    while i < len(a) and j < len(b):
+        gap = abs(a[i] - b[j])
+        if best is None or gap < best:
+            best = gap
+        if a[i] < b[j]:
+            i += 1
+        else:
+            j += 1
+    return best
+
+
+def _rank_key(item):
+    """Order (doc, score) pairs by score, breaking ties by corpus order"""
+    return item[1], -item[0]
+
+
 class BM25:
-    """BM25 ranking algorithm for text search"""
+    """BM25 ranking algorithm for text search
+
+    Terms are mapped to integer IDs; postings are stored CSR-style in flat
+    arrays: the postings of term t are post_docs/post_tfs[post_ptr[t]:post_ptr[t + 1]].
+    Token positions are a second CSR level: posting p occurs at
+    positions[pos_ptr[p]:pos_ptr[p + 1]] in its document.
 
-    def __init__(self, k1=1.5, b=0.75):
+    With field weights (BM25F) documents are tuples of field texts, tokenized
+    into one stream; field f of document d starts at offset
+    field_starts[d * F + f], so per-field term frequencies come from the
+    positions and are folded into the precomputed posting weights.
+    """
+
+    def __init__(self, k1=1.5, b=0.75, tokenizer=None, field_weights=()):
         self.k1 = k1
         self.b = b
-        self.corpus = []
-        self.doc_lengths = []
+        self.tokenizer = tokenizer or DEFAULT_TOKENIZER
+        self.field_weights = array('d', field_weights)
+        self.field_starts = array('I')
+        self.vocab = {}
+        self.terms = []
+        self.doc_lengths = array('I')
         self.avgdl = 0
-        self.idf = {}
-        self.doc_freqs = defaultdict(int)
+        self.idf = array('d')
+        self.post_ptr = array('I', [0])
+        self.post_docs = array('I')
+        self.post_tfs = array('I')
+        self.pos_ptr = array('I', [0])
+        self.positions = array('I')
         self.N = 0
+        self._weights = None
+        self._trigrams = None
 
     def tokenize(self, text):
         """Lowercase, split, remove punctuation, filter short words"""
-        text = re.sub(r'[^\w\s]', ' ', str(text).lower())
-        return [w for w in text.split() if len(w) > 2]
+        return list(self.tokenizer(text))
 
     def fit(self, documents):
-        """Build BM25 index from documents"""
-        self.corpus = [self.tokenize(doc) for doc in documents]
-        self.N = len(self.corpus)
+        """Build BM25 index from documents (tuples of field texts when field weights are set)"""
+        vocab = {}
+        doc_counts = []
+        lengths = array('I')
+        for doc in documents:
+            occurrences = {}
+            if self.field_weights:
+                tokens = ()
+                for text in doc:
+                    self.field_starts.append(len(tokens))
+                    tokens += self.tokenizer(text)
+            else:
+                tokens = self.tokenizer(doc)
+            for offset, word in enumerate(tokens):
+                tid = vocab.setdefault(word, len(vocab))
+                occurrences.setdefault(tid, []).append(offset)
+            doc_counts.append(occurrences)
+            lengths.append(len(tokens))
+
+        self.N = len(doc_counts)
         if self.N == 0:
             return
-        self.doc_lengths = [len(doc) for doc in self.corpus]
-        self.avgdl = sum(self.doc_lengths) / self.N
+        self.vocab = vocab
+        self.terms = list(vocab)
+        self.doc_lengths = lengths
+        self.avgdl = sum(lengths) / self.N
 
-        for doc in self.corpus:
-            seen = set()
-            for word in doc:
-                if word not in seen:
-                    self.doc_freqs[word] += 1
-                    seen.add(word)
+        buckets = [[] for _ in self.terms]
+        for idx, occurrences in enumerate(doc_counts):
+            for tid, offsets in occurrences.items():
+                buckets[tid].append((idx, offsets))
 
-        for word, freq in self.doc_freqs.items():
-            self.idf[word] = log((self.N - freq + 0.5) / (freq + 0.5) + 1)
+        for bucket in buckets:
+            for idx, offsets in bucket:
+                self.post_docs.append(idx)
+                self.post_tfs.append(len(offsets))
+                self.positions.extend(offsets)
+                self.pos_ptr.append(len(self.positions))
+            self.post_ptr.append(len(self.post_docs))
 
-    def score(self, query):
-        """Score all documents against query"""
-        query_tokens = self.tokenize(query)
-        scores = []
+        self.idf = array('d', (
+            log((self.N - len(bucket) + 0.5) / (len(bucket) + 0.5) + 1) for bucket in buckets
+        ))
 
-        for idx, doc in enumerate(self.corpus):
-            score = 0
-            doc_len = self.doc_lengths[idx]
-            term_freqs = defaultdict(int)
-            for word in doc:
-                term_freqs[word] += 1
+    def weights(self):
+        """Per-posting BM25 (BM25F with field weights) weights aligned with post_docs, built on first use"""
+        if self._weights is None and self.field_weights:
+            self._weights = self._field_weights()
+        if self._weights is None:
+            norm = self.k1 * (1 - self.b)
+            slope = self.k1 * self.b / self.avgdl if self.avgdl else 0
+            lengths = self.doc_lengths
+            weights = array('d', bytes(8 * len(self.post_docs)))
+            for tid, idf in enumerate(self.idf):
+                for pos in range(self.post_ptr[tid], self.post_ptr[tid + 1]):
+                    tf = self.post_tfs[pos]
+                    weights[pos] = idf * tf * (self.k1 + 1) / (tf + norm + slope * lengths[self.post_docs[pos]])
+            self._weights = weights
+        return self._weights
 
-            for token in query_tokens:
-                if token in self.idf:
-                    tf = term_freqs[token]
-                    idf = self.idf[token]
-                    numerator = tf * (self.k1 + 1)
-                    denominator = tf + self.k1 * (1 - self.b + self.b * doc_len / self.avgdl)
-                    score += idf * numerator / denominator
+    def _field_weights(self):
+        """BM25F: per-field frequencies, each normalized by its field length and weighted, then saturated once"""
+        n_fields = len(self.field_weights)
+        starts = self.field_starts
+        sizes = array('I', bytes(4 * len(starts)))
+        for doc in range(self.N):
+            base = doc * n_fields
+            for f in range(n_fields):
+                end = starts[base + f + 1] if f + 1 < n_fields else self.doc_lengths[doc]
+                sizes[base + f] = end - starts[base + f]
+        averages = [sum(sizes[f::n_fields]) / self.N for f in range(n_fields)]
 
-            scores.append((idx, score))
+        weights = array('d', bytes(8 * len(self.post_docs)))
+        for tid, idf in enumerate(self.idf):
+            for pos in range(self.post_ptr[tid], self.post_ptr[tid + 1]):
+                base = self.post_docs[pos] * n_fields
+                bounds = starts[base:base + n_fields]
+                counts = [0] * n_fields
+                for offset in self.positions[self.pos_ptr[pos]:self.pos_ptr[pos + 1]]:
+                    counts[bisect_right(bounds, offset) - 1] += 1
+                tf = 0.0
+                for f, count in enumerate(counts):
+                    if count:
+                        tf += self.field_weights[f] * count / (1 - self.b + self.b * sizes[base + f] / averages[f])
+                weights[pos] = idf * tf * (self.k1 + 1) / (tf + self.k1)
+        return weights
 
-        return sorted(scores, key=lambda x: x[1], reverse=True)
+    def trigrams(self):
+        """Trigram index over the vocabulary, built on the first unknown token"""
+        if self._trigrams is None:
+            self._trigrams = TrigramIndex(self.terms)
+        return self._trigrams
 
+    def correct(self, query):
+        """(corrected query, {typo: term}) with unknown tokens mapped to vocabulary terms"""
+        return _correct(self.tokenizer, self.vocab, self.trigrams, query)
 
-# ============ SEARCH FUNCTIONS ============
-def _load_csv(filepath):
-    """Load CSV and return list of dicts"""
-    with open(filepath, 'r', encoding='utf-8') as f:
-        return list(csv.DictReader(f))
+    def _locate(self, tid, doc):
+        """Index of doc's posting for term tid, or None (postings are sorted by document)"""
+        start, end = self.post_ptr[tid], self.post_ptr[tid + 1]
+        pos = bisect_left(self.post_docs, doc, start, end)
+        return pos if pos < end and self.post_docs[pos] == doc else None
 
+    def _positions(self, posting):
+        """Token offsets of one posting"""
+        return self.positions[self.pos_ptr[posting]:self.pos_ptr[posting + 1]]
 
-def _search_csv(filepath, search_cols, output_cols, query, max_results):
-    """Core search function using BM25"""
-    if not filepath.exists():
-        return []
+    def phrase_match(self, doc, tokens):
+        """True if tokens occur consecutively in doc, found by merging position lists"""
+        starts = None
+        for shift, token in enumerate(tokens):
+            tid = self.vocab.get(token)
+            posting = None if tid is None else self._locate(tid, doc)
+            if posting is None:
+                return False
+            positions = self._positions(posting)
+            starts = list(positions) if starts is None else _merge_shifted(starts, positions, shift)
+            if not starts:
+                return False
+        return True
+
+    def _proximity(self, pairs, weights, acc):
+        """Add a bonus to documents of acc in which a pair of query terms appear close together"""
+        ptr, docs = self.post_ptr, self.post_docs
+        for a, b in pairs:
+            first = dict(zip(docs[ptr[a]:ptr[a + 1]], range(ptr[a], ptr[a + 1])))
+            for pb in range(ptr[b], ptr[b + 1]):
+                pa = first.get(docs[pb])
+                if pa is None or docs[pb] not in acc:
+                    continue
+                gap = _min_gap(self._positions(pa), self._positions(pb))
+                if gap <= PROXIMITY_WINDOW:
+                    acc[docs[pb]] += PROXIMITY_BOOST * (weights[pa] + weights[pb]) / (2 * gap)
+
+    def score(self, query, k=None, allowed=None):
+        """Score documents sharing a term with the query and return the top k (all if k is None)"""
+        return self.score_many([query], k, allowed)[0]
+
+    def score_many(self, queries, k=None, allowed=None):
+        """Score a batch of queries as one sparse query-term x term-document product
+
+        Documents must contain every double-quoted phrase; unquoted terms that
+        appear within PROXIMITY_WINDOW tokens of each other earn a bonus. If
+        allowed is given, only those document ids are scored.
+        """
+        weights = self.weights()
+
+        # Query-term matrix: for each term ID, the queries using it and how often
+        columns = defaultdict(lambda: defaultdict(int))
+        for qi, query in enumerate(queries):
+            for token in self.tokenizer(query):
+                tid = self.vocab.get(token)
+                if tid is not None:
+                    columns[tid][qi] += 1
+
+        scores = [defaultdict(float) for _ in queries]
+        for tid, uses in columns.items():
+            start, end = self.post_ptr[tid], self.post_ptr[tid + 1]
+            row = zip(self.post_docs[start:end], weights[start:end])
+            row = [(idx, w) for idx, w in row if idx in allowed] if allowed is not None else list(row)
+            for qi, count in uses.items():
+                acc = scores[qi]
+                for idx, weight in row:
+                    acc[idx] += count * weight
+
+        for query, acc in zip(queries, scores):
+            if not acc:
+                continue
+            for phrase in self.tokenizer.phrases(query):
+                for idx in [idx for idx in acc if not self.phrase_match(idx, phrase)]:
+                    del acc[idx]
+            tids = [self.vocab[t] for t in self.tokenizer(query) if t in self.vocab]
+            pairs = list(dict.fromkeys((a, b) for a, b in zip(tids, tids[1:]) if a != b))
+            if pairs:
+                self._proximity(pairs, weights, acc)
+
+        if k is None:
+            return [sorted(acc.items(), key=_rank_key, reverse=True) for acc in scores]
+        return [heapq.nlargest(k, acc.items(), key=_rank_key) for acc in scores]
+
+    def to_dict(self):
+        """Serialize the fitted index to plain Python types and arrays"""
+        return {
+            "k1": self.k1,
+            "b": self.b,
+            "tokenizer": self.tokenizer.config(),
+            "N": self.N,
+            "avgdl": self.avgdl,
+            "terms": self.terms,
+            "doc_lengths": self.doc_lengths,
+            "idf": self.idf,
+            "post_ptr": self.post_ptr,
+            "post_docs": self.post_docs,
+            "post_tfs": self.post_tfs,
+            "pos_ptr": self.pos_ptr,
+            "positions": self.positions,
+            "field_weights": self.field_weights,
+            "field_starts": self.field_starts
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Restore an index produced by to_dict()"""
+        config = data["tokenizer"]
+        tokenizer = tokenizer_for(config.get("min_len", 3), config.get("stopwords", ()))
+        bm25 = cls(data["k1"], data["b"], tokenizer, data.get("field_weights", ()))
+        bm25.field_starts = data.get("field_starts", bm25.field_starts)
+        bm25.N = data["N"]
+        bm25.avgdl = data["avgdl"]
+        bm25.terms = [sys.intern(t) for t in data["terms"]]
+        bm25.vocab = {term: tid for tid, term in enumerate(bm25.terms)}
+        bm25.doc_lengths = data["doc_lengths"]
+        bm25.idf = data["idf"]
+        bm25.post_ptr = data["post_ptr"]
+        bm25.post_docs = data["post_docs"]
+        bm25.post_tfs = data["post_tfs"]
+        bm25.pos_ptr = data["pos_ptr"]
+        bm25.positions = data["positions"]
+        return bm25
 
-    data = _load_csv(filepath)
 
-    # Build documents from search columns
-    documents = [" ".join(str(row.get(col, "")) for col in search_cols) for row in data]
+# ============ ROW STORE ============
+class ColumnStore:
+    """Column-oriented storage for CSV rows
 
-    # BM25 search
-    bm25 = BM25()
+    Low-cardinality columns (Severity, Platform, Type, ...) are dictionary
+    encoded as a value table plus one byte code per row. Other columns keep
+    all their cells in one UTF-8 blob with an offsets array, so a cell is only
+    decoded when a row is actually returned.
+    """
+
+    def __init__(self, columns, n_rows):
+        self.columns = columns
+        self.n_rows = n_rows
+        self._facets = {}
+
+    @classmethod
+    def from_rows(cls, header, rows):
+        """Build from parsed CSV value lists; short rows get None like csv.DictReader"""
+        columns = {}
+        for pos, name in enumerate(header):
+            cells = [values[pos] if pos < len(values) else None for values in rows]
+            distinct = list(dict.fromkeys(cells))
+            if len(distinct) <= 255 and len(distinct) * 4 <= len(cells):
+                codes = {value: code for code, value in enumerate(distinct)}
+                columns[name] = ("dict", distinct, array('B', (codes[cell] for cell in cells)))
+            else:
+                blob = bytearray()
+                offsets = array('I', [0])
+                nulls = set()
+                for idx, cell in enumerate(cells):
+                    if cell is None:
+                        nulls.add(idx)
+                    else:
+                        blob += cell.encode('utf-8')
+                    offsets.append(len(blob))
+                columns[name] = ("text", bytes(blob), offsets, frozenset(nulls))
+        return cls(columns, len(rows))
+
+    def value(self, name, idx):
+        """Decode a single cell"""
+        column = self.columns[name]
+        if column[0] == "dict":
+            return column[1][column[2][idx]]
+        _, blob, offsets, nulls = column
+        if idx in nulls:
+            return None
+        return str(blob[offsets[idx]:offsets[idx + 1]], 'utf-8')
+
+    def record(self, idx, cols):
+        """Output dict for one row, restricted to cols"""
+        return {col: self.value(col, idx) for col in cols if col in self.columns}
+
+    def facet(self, name):
+        """{lowercased value: bitmap of the rows holding it} for a column, built on first use"""
+        bitmaps = self._facets.get(name)
+        if bitmaps is None:
+            bitmaps = {}
+            if name in self.columns:
+                for idx in range(self.n_rows):
+                    value = (self.value(name, idx) or "").strip().lower()
+                    bitmaps[value] = bitmaps.get(value, 0) | (1 << idx)
+            self._facets[name] = bitmaps
+        return bitmaps
+
+    def matching(self, filters):
+        """Bitmap of the rows passing every (column, values) filter: OR within a column, AND across"""
+        mask = (1 << self.n_rows) - 1
+        for name, values in filters:
+            bitmaps = self.facet(name)
+            allowed = 0
+            for value in values:
+                allowed |= bitmaps.get(value, 0)
+            mask &= allowed
+        return mask
+
+    def to_dict(self):
+        """Serialize for the index cache"""
+        return {"columns": self.columns, "n_rows": self.n_rows}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Restore a store produced by to_dict()"""
+        return cls(data["columns"], data["n_rows"])
+
+
+def _bits(mask):
+    """Positions of the set bits of an int bitmap, lowest first"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def parse_filters(filters, facet_cols):
+    """Normalize {column: value or [values]} to a sorted tuple of (column, values)
+
+    Column names are matched case-insensitively against facet_cols; a string
+    value may list alternatives separated by commas. Raises ValueError for a
+    column that cannot be filtered.
+    """
+    if not filters:
+        return ()
+    columns = {col.lower(): col for col in facet_cols}
+    normalized = {}
+    for name, values in filters.items():
+        column = columns.get(name.strip().lower())
+        if column is None:
+            available = ", ".join(facet_cols) or "none"
+            raise ValueError(f"Cannot filter on {name}. Filterable columns: {available}")
+        if isinstance(values, str):
+            values = values.split(",")
+        normalized.setdefault(column, set()).update(v.strip().lower() for v in values)
+    return tuple(sorted((column, tuple(sorted(values))) for column, values in normalized.items()))
+
+
+# ============ INDEX CACHE ============
+class CorpusIndex:
+    """Fitted BM25 index for one CSV file plus its rows in columnar form"""
+
+    def __init__(self, header, store, bm25):
+        self.header = header
+        self.store = store
+        self.bm25 = bm25
+        self._prefixes = {}
+
+    def prefixes(self, name_col=None):
+        """PrefixIndex over the name column and the vocabulary, built on first use"""
+        index = self._prefixes.get(name_col)
+        if index is None:
+            names = []
+            if name_col in self.store.columns:
+                names = [self.store.value(name_col, idx) or "" for idx in range(self.store.n_rows)]
+            bm25 = self.bm25
+            frequencies = [bm25.post_ptr[tid + 1] - bm25.post_ptr[tid] for tid in range(len(bm25.terms))]
+            index = self._prefixes[name_col] = PrefixIndex(names, bm25.terms, frequencies)
+        return index
+
+    def record(self, idx, cols):
+        """Output dict for a winning row"""
+        return self.store.record(idx, cols)
+
+    def allowed(self, filters):
+        """Set of row ids passing the facet filters (see parse_filters), or None for no filter"""
+        if not filters:
+            return None
+        return frozenset(_bits(self.store.matching(filters)))
+
+
+_INDEXES = {}
+_SNAPSHOT = {}
+_DATA_VERSION = 0
+
+
+def _split_rows(raw):
+    """Parse CSV bytes into a header and per-row value lists, skipping blank lines"""
+    import csv
+    reader = csv.reader(io.StringIO(raw.decode('utf-8'), newline=''))
+    header = next(reader, [])
+    return header, [values for values in reader if values]
+
+
+def _cache_path(filepath, search_cols):
+    """Cache file for a CSV: <stem>-<location key>-<settings key>.idx (indexed columns and BM25 settings)"""
+    params = sorted(corpus_params(filepath).items())
+    location = zlib.crc32(str(filepath.resolve()).encode('utf-8'))
+    settings = zlib.crc32(f"{'|'.join(search_cols)}|{params}".encode('utf-8'))
+    return CACHE_DIR / f"{filepath.stem}-{location:08x}-{settings:08x}.idx"
+
+
+def _prune_cache(path):
+    """Delete the files path supersedes: the same CSV under other settings, and any in the old one-key naming"""
+    stem, location, _ = path.stem.rsplit("-", 2)
+    stale = re.compile(re.escape(stem) + f"-(?:{location}-)?[0-9a-f]{{8}}" + re.escape(path.suffix))
+    try:
+        others = [other for other in path.parent.iterdir() if other != path and stale.fullmatch(other.name)]
+    except OSError:
+        return
+    for other in others:
+        try:
+            other.unlink()
+        except OSError:
+            pass
+
+
+def corpus_params(filepath):
+    """BM25 settings for a data file: BM25_DEFAULTS updated with its config's "bm25" entry"""
+    params = dict(BM25_DEFAULTS)
+    try:
+        name = Path(filepath).relative_to(DATA_DIR).as_posix()
+    except ValueError:
+        return params
+    for _, config in all_corpora():
+        if config["file"] == name:
+            params.update(config.get("bm25", {}))
+            break
+    return params
+
+
+def _build_index(raw, search_cols, params=None):
+    """Parse CSV bytes and fit a fresh BM25 index"""
+    params = dict(BM25_DEFAULTS, **(params or {}))
+    header, rows = _split_rows(raw)
+    store = ColumnStore.from_rows(header, rows)
+
+    # Only the search columns are tokenized; with field weights each stays a separate field
+    positions = [header.index(col) for col in search_cols if col in header]
+    tokenizer = tokenizer_for(params["min_len"], params["stopwords"])
+    if params["field_weights"]:
+        documents = [tuple(values[pos] if pos < len(values) else "" for pos in positions) for values in rows]
+        field_weights = [float(params["field_weights"].get(header[pos], 1.0)) for pos in positions]
+    else:
+        documents = [" ".join(values[pos] for pos in positions if pos < len(values)) for values in rows]
+        field_weights = ()
+    bm25 = BM25(params["k1"], params["b"], tokenizer, field_weights)
     bm25.fit(documents)
-    ranked = bm25.score(query)
+    return CorpusIndex(header, store, bm25)
 
-    # Get top results with score > 0
-    results = []
-    for idx, score in ranked[:max_results]:
-        if score > 0:
-            row = data[idx]
-            results.append({col: row.get(col, "") for col in output_cols if col in row})
 
-    return results
+def _read_cache(path, version=None):
+    """Load a cached payload, or None if missing, unreadable or not of version (default INDEX_VERSION)"""
+    try:
+        with open(path, 'rb') as f:
+            payload = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ValueError):
+        return None
+    if not isinstance(payload, dict) or payload.get("version") != (INDEX_VERSION if version is None else version):
+        return None
+    return payload
+
+
+def _write_pickle(path, payload):
+    """Pickle a cache payload atomically; a read-only cache dir is not an error
+
+    Every write gets its own temp file, so concurrent writers (daemon threads,
+    the watcher, other processes) never replace each other's half-written file.
+    """
+    import tempfile
+    tmp = None
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=f"{path.name}.", suffix=".tmp", dir=path.parent)
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except OSError:
+        if tmp:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+
+
+def _write_cache(path, signature, digest, index):
+    """Persist an index for later runs"""
+    _write_pickle(path, {
+        "version": INDEX_VERSION,
+        "signature": signature,
+        "digest": digest,
+        "header": index.header,
+        "store": index.store.to_dict(),
+        "bm25": index.bm25.to_dict()
+    })
+    _prune_cache(path)
+
+
+def _from_payload(payload):
+    """CorpusIndex restored from a cache payload"""
+    return CorpusIndex(payload["header"], ColumnStore.from_dict(payload["store"]), BM25.from_dict(payload["bm25"]))
+
+
+def _file_signature(filepath):
+    """Cheap change detector: modification time and size"""
+    stat = os.stat(filepath)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _digest(raw):
+    """Content hash of a data file"""
+    import hashlib
+    return hashlib.sha256(raw).hexdigest()
+
+
+def _snapshot():
+    """The mapped knowledge-base snapshot (see snapshot.py), reopened when it is rebuilt"""
+    from snapshot import default_path, open_snapshot
+    path = default_path()
+    try:
+        key = (path, _file_signature(path))
+    except OSError:
+        return None
+    if _SNAPSHOT.get("key") != key:
+        _SNAPSHOT["key"] = key
+        _SNAPSHOT["snapshot"] = open_snapshot(path)
+    return _SNAPSHOT["snapshot"]
+
+
+def _install(key, signature, digest, index):
+    """Memoize a loaded index; replacing a corpus with new content bumps the data version"""
+    global _DATA_VERSION
+    previous = _INDEXES.get(key)
+    # Installed before the bump: a reader that sees the new version also sees the new index
+    _INDEXES[key] = (signature, digest, index)
+    if previous and previous[1] != digest:
+        _DATA_VERSION += 1
+
+
+def data_version():
+    """Counter bumped every time a loaded corpus is reindexed with changed content"""
+    return _DATA_VERSION
+
+
+def load_index(filepath, search_cols):
+    """Return the BM25 index for a CSV, reusing the on-disk cache when the content hash matches
+
+    Loaded indexes are memoized per process. A corpus whose CSV is unchanged
+    since `search.py build` is served straight from the mapped snapshot;
+    otherwise the per-file cache applies. A file is re-read and re-hashed
+    only when its mtime or size differs from what the memo or the cache file
+    recorded, and reindexed only when its content hash changed, so editing
+    one CSV leaves every other index untouched.
+    """
+    key = (str(filepath), tuple(search_cols))
+    signature = _file_signature(filepath)
+    cached = _INDEXES.get(key)
+    if cached and cached[0] == signature:
+        return cached[2]
+
+    snapshot = _snapshot()
+    hit = snapshot.load(filepath, search_cols, signature) if snapshot else None
+    if hit:
+        digest, index = hit
+        _install(key, signature, digest, index)
+        return index
+
+    # Untouched since the cache file was written: no need to read or hash the CSV
+    path = _cache_path(filepath, search_cols)
+    payload = _read_cache(path)
+    if payload and tuple(payload.get("signature", ())) == signature:
+        index = _from_payload(payload)
+        _install(key, signature, payload["digest"], index)
+        return index
+
+    with open(filepath, 'rb') as f:
+        raw = f.read()
+    digest = _digest(raw)
+
+    if cached and cached[1] == digest:
+        index = cached[2]
+    elif payload and payload.get("digest") == digest:
+        index = _from_payload(payload)
+    else:
+        index = _build_index(raw, search_cols, corpus_params(filepath))
+    _write_cache(path, signature, digest, index)
+
+    _install(key, signature, digest, index)
+    return index
+
+
+def refresh():
+    """Re-check every loaded index and reindex the files whose content changed"""
+    changed = []
+    for (filepath, search_cols), (_, _, index) in list(_INDEXES.items()):
+        try:
+            if load_index(Path(filepath), search_cols) is not index:
+                changed.append(filepath)
+        except OSError:
+            continue
+    return changed
+
+
+# ============ RESULT CACHE ============
+class ResultCache:
+    """Bounded LRU of finished results, emptied whenever the data version changes
+
+    Entries are (results, corrections) pairs; callers get fresh copies of the
+    row dicts so a caller mutating its results cannot poison the cache. A lock
+    guards the entries, since daemon threads share one cache.
+    """
+
+    def __init__(self, maxsize=RESULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Cached entry for key under the current data version, or None"""
+        with self._lock:
+            if self.version != _DATA_VERSION:
+                self._entries.clear()
+                self.version = _DATA_VERSION
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+        results, corrections = entry
+        return [dict(row) for row in results], dict(corrections)
+
+    def put(self, key, results, corrections, version):
+        """Store an entry scored at data version version, evicting the least recently used beyond maxsize
+
+        The entry is dropped when the data changed since version (the results
+        came from an index that has been replaced) or version is None.
+        """
+        if self.maxsize <= 0 or version is None:
+            return
+        entry = ([dict(row) for row in results], dict(corrections))
+        with self._lock:
+            if version != _DATA_VERSION:
+                return
+            if self.version != version:
+                self._entries.clear()
+                self.version = version
+            self._entries[key] = entry
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every entry and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def info(self):
+        """Hit/miss counters for instrumentation"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "data_version": self.version
+            }
+
+
+_RESULTS = ResultCache()
+
+
+def _query_key(query):
+    """Cache key form of a query: case and whitespace do not change the results"""
+    return " ".join(query.lower().split())
+
+
+def cache_info():
+    """Result cache counters (hits, misses, size, maxsize, data_version)"""
+    return _RESULTS.info()
+
+
+# ============ SEARCH FUNCTIONS ============
+def _search_csv_many(filepath, search_cols, output_cols, queries, max_results, mode="bm25", filters=(), dedupe=False, index=None,
+                     version=None):
+    """Score a batch of queries against one CSV with a single index load
+
+    mode is "bm25", "dense" (LSA, see lsa.py) or "hybrid" (both, fused).
+    filters come from parse_filters(); only rows passing them are scored.
+    dedupe keeps one row per near-duplicate cluster (see dedup.py).
+    index skips the load (and freshness check) when the caller holds one;
+    version is the data version it was loaded at (results scored against a
+    held index without one are not cached).
+    Returns one (results, corrections) pair per query.
+    """
+    if index is None:
+        # Read before loading, so a reindex during this call keeps its results out of the cache
+        version = _DATA_VERSION
+        if not filepath.exists():
+            return [([], {}) for _ in queries]
+        index = load_index(filepath, search_cols)
+
+    # Repeated lookups come from the result cache; the rest are scored once each
+    prefix = (str(filepath), tuple(output_cols), max_results, mode, filters, dedupe)
+    done = {}
+    for query in queries:
+        norm = _query_key(query)
+        if norm not in done:
+            done[norm] = _RESULTS.get(prefix + (norm,))
+    pending = [norm for norm, entry in done.items() if entry is None]
+
+    # Typos are corrected before scoring
+    corrected = [index.bm25.correct(norm) for norm in pending]
+    texts = [text for text, _ in corrected]
+    allowed = index.allowed(filters) if pending else None
+    depth = max_results * DEDUPE_FANOUT if dedupe else max_results
+    if mode == "bm25":
+        ranked = index.bm25.score_many(texts, depth, allowed)
+    elif pending:
+        import lsa
+        ranked = lsa.score_many(index, lsa.load_model(filepath, search_cols), texts, depth, mode, allowed)
+    else:
+        ranked = []
+    if dedupe and pending:
+        import dedup
+        labels = dedup.load_clusters(filepath).of(filepath)
+        if labels is not None:
+            ranked = [dedup.collapse(hits, labels.__getitem__, max_results) for hits in ranked]
+        else:
+            # No cluster table for this corpus: nothing to collapse, but the fan-out still goes
+            ranked = [hits[:max_results] for hits in ranked]
+    for norm, hits, (_, fixes) in zip(pending, ranked, corrected):
+        # Get top results with score > 0, parsing only the winning rows
+        results = [index.record(idx, output_cols) for idx, score in hits if score > 0]
+        _RESULTS.put(prefix + (norm,), results, fixes, version)
+        done[norm] = (results, fixes)
+
+    return [done[_query_key(query)] for query in queries]
+
+
+def _response(base, results, corrections):
+    """Attach results (and typo corrections, if any) to a response dict"""
+    base["count"] = len(results)
+    base["results"] = results
+    if corrections:
+        base["corrections"] = corrections
+    return base
+
+
+def all_corpora():
+    """Every searchable corpus as (source, config), stacks tagged as stack/<name>"""
+    corpora = list(CSV_CONFIG.items())
+    corpora += [(f"stack/{name}", dict(config, **_STACK_COLS)) for name, config in STACK_CONFIG.items()]
+    return corpora
+
+
+def load_all():
+    """(source, config, CorpusIndex) for every corpus whose CSV exists"""
+    parts = []
+    for source, config in all_corpora():
+        filepath = DATA_DIR / config["file"]
+        if filepath.exists():
+            parts.append((source, config, load_index(filepath, config["search_cols"])))
+    return parts
+
+
+def corpora_digest(parts):
+    """Hash of the contents and BM25 settings of loaded corpora, for caches derived from all of them"""
+    keys = []
+    for source, config, _ in parts:
+        filepath = DATA_DIR / config["file"]
+        digest = _INDEXES[(str(filepath), tuple(config["search_cols"]))][1]
+        keys.append(f"{source}:{digest}:{sorted(corpus_params(filepath).items())}")
+    return _digest("\n".join(keys).encode('utf-8'))
+
+
+# ============ FEDERATED SEARCH ============
+class FederatedIndex:
+    """Single inverted index over every corpus, postings tagged by source"""
+
+    def __init__(self, parts):
+        self.parts = parts
+        self.tokenizer = DEFAULT_TOKENIZER
+        self.doc_corpus = array('H')
+        self.doc_local = array('I')
+        self.bases = []
+        docs = defaultdict(lambda: array('I'))
+        weights = defaultdict(lambda: array('d'))
+        self.term_max = defaultdict(dict)
+
+        for cid, (source, config, index) in enumerate(parts):
+            bm25 = index.bm25
+            base = len(self.doc_local)
+            self.bases.append(base)
+            self.doc_corpus.extend([cid] * bm25.N)
+            self.doc_local.extend(range(bm25.N))
+            corpus_weights = bm25.weights()
+            for tid, term in enumerate(bm25.terms):
+                start, end = bm25.post_ptr[tid], bm25.post_ptr[tid + 1]
+                docs[term].extend(base + idx for idx in bm25.post_docs[start:end])
+                weights[term].extend(corpus_weights[start:end])
+                self.term_max[term][cid] = max(corpus_weights[start:end])
+
+        self.postings = {term: (docs[term], weights[term]) for term in docs}
+        self._trigrams = None
+
+    def trigrams(self):
+        """Trigram index over the unified vocabulary, built on first use"""
+        if self._trigrams is None:
+            self._trigrams = TrigramIndex(self.postings)
+        return self._trigrams
+
+    def correct(self, query):
+        """(corrected query, {typo: term}) against the unified vocabulary"""
+        return _correct(self.tokenizer, self.postings, self.trigrams, query)
+
+    def facet_cols(self):
+        """Every filterable column of any corpus"""
+        return list(dict.fromkeys(col for _, config, _ in self.parts for col in config.get("facet_cols", ())))
+
+    def allowed(self, filters):
+        """Global doc ids passing the filters; corpora lacking a filtered column are excluded"""
+        if not filters:
+            return None
+        allowed = set()
+        for cid, (_, config, index) in enumerate(self.parts):
+            if all(col in config.get("facet_cols", ()) for col, _ in filters):
+                base = self.bases[cid]
+                allowed.update(base + idx for idx in _bits(index.store.matching(filters)))
+        return allowed
+
+    def score(self, query, k, allowed=None):
+        """One pass over the unified postings, normalizing each hit against its own corpus"""
+        tokens = [t for t in self.tokenizer(query) if t in self.postings]
+        raw = defaultdict(float)
+        matched = defaultdict(int)
+        ideal = defaultdict(float)
+        for token in tokens:
+            for gid, weight in zip(*self.postings[token]):
+                if allowed is not None and gid not in allowed:
+                    continue
+                raw[gid] += weight
+                matched[gid] += 1
+            for cid, weight in self.term_max[token].items():
+                ideal[cid] += weight
+        # Quoted phrases are checked against the positions of each hit's own corpus
+        for phrase in self.tokenizer.phrases(query):
+            for gid in list(raw):
+                bm25 = self.parts[self.doc_corpus[gid]][2].bm25
+                if not bm25.phrase_match(self.doc_local[gid], phrase):
+                    del raw[gid]
+        # Fraction of the best score the corpus could give, times query-term coverage
+        normalized = (
+            (gid, score / ideal[self.doc_corpus[gid]] * matched[gid] / len(tokens))
+            for gid, score in raw.items()
+        )
+        return heapq.nlargest(k, normalized, key=_rank_key)
+
+
+_FEDERATED = {}
+
+
+def load_federated():
+    """Return the federated index, rebuilt only when one of its corpora changed"""
+    parts = load_all()
+
+    key = tuple(id(index) for _, _, index in parts)
+    if _FEDERATED.get("key") != key:
+        _FEDERATED["key"] = key
+        _FEDERATED["index"] = FederatedIndex(parts)
+    return _FEDERATED["index"]
+
+
+def search_all(query, max_results=MAX_RESULTS, filters=None, dedupe=False):
+    """Federated search: global top-k across every domain and stack"""
+    version = _DATA_VERSION
+    federated = load_federated()
+    try:
+        filters = parse_filters(filters, federated.facet_cols())
+    except ValueError as e:
+        return {"error": str(e), "domain": "all"}
+    key = ("all", max_results, filters, dedupe, _query_key(query))
+    cached = _RESULTS.get(key)
+    if cached:
+        results, corrections = cached
+    else:
+        text, corrections = federated.correct(query)
+        results = []
+        hits = federated.score(text, max_results * DEDUPE_FANOUT if dedupe else max_results, federated.allowed(filters))
+        if dedupe:
+            import dedup
+            clusters = dedup.load_clusters()
+            labels = [clusters.of(DATA_DIR / config["file"]) for _, config, _ in federated.parts]
+
+            def cluster_of(gid):
+                corpus_labels = labels[federated.doc_corpus[gid]]
+                return corpus_labels[federated.doc_local[gid]] if corpus_labels is not None else -1
+            hits = dedup.collapse(hits, cluster_of, max_results)
+        for gid, score in hits:
+            if score > 0:
+                source, config, index = federated.parts[federated.doc_corpus[gid]]
+                result = {"Source": source}
+                result.update(index.record(federated.doc_local[gid], config["output_cols"]))
+                results.append(result)
+        _RESULTS.put(key, results, corrections, version)
+
+    return _response({
+        "domain": "all",
+        "query": query,
+        "file": f"{len(federated.parts)} corpora"
+    }, results, corrections)
 
 
 def detect_domain(query):
@@ -214,8 +1328,22 @@ def detect_domain(query):
     return best if scores[best] > 0 else "style"
 
 
-def search(query, domain=None, max_results=MAX_RESULTS):
+def _check_mode(mode, domain=None):
+    """Error message for an unsupported retrieval mode, or None"""
+    if mode not in SEARCH_MODES:
+        return f"Unknown mode: {mode}. Available: {', '.join(SEARCH_MODES)}"
+    if domain == "all" and mode != "bm25":
+        return "Dense and hybrid modes rank within one corpus; pick a domain or stack"
+    return None
+
+
+def search(query, domain=None, max_results=MAX_RESULTS, mode="bm25", filters=None, dedupe=False):
     """Main search function with auto-domain detection"""
+    error = _check_mode(mode, domain)
+    if error:
+        return {"error": error, "domain": domain}
+    if domain == "all":
+        return search_all(query, max_results, filters, dedupe)
     if domain is None:
         domain = detect_domain(query)
 
@@ -224,20 +1352,25 @@ def search(query, domain=None, max_results=MAX_RESULTS):
 
     if not filepath.exists():
         return {"error": f"File not found: {filepath}", "domain": domain}
+    try:
+        filters = parse_filters(filters, config.get("facet_cols", ()))
+    except ValueError as e:
+        return {"error": str(e), "domain": domain}
 
-    results = _search_csv(filepath, config["search_cols"], config["output_cols"], query, max_results)
+    results, corrections = _search_csv_many(filepath, config["search_cols"], config["output_cols"], [query], max_results, mode, filters, dedupe)[0]
 
-    return {
+    return _response({
         "domain": domain,
         "query": query,
-        "file": config["file"],
-        "count": len(results),
-        "results": results
-    }
+        "file": config["file"]
+    }, results, corrections)
 
 
-def search_stack(query, stack, max_results=MAX_RESULTS):
+def search_stack(query, stack, max_results=MAX_RESULTS, mode="bm25", filters=None, dedupe=False):
     """Search stack-specific guidelines"""
+    error = _check_mode(mode)
+    if error:
+        return {"error": error, "stack": stack}
     if stack not in STACK_CONFIG:
         return {"error": f"Unknown stack: {stack}. Available: {', '.join(AVAILABLE_STACKS)}"}
 
@@ -245,14 +1378,254 @@ def search_stack(query, stack, max_results=MAX_RESULTS):
 
     if not filepath.exists():
         return {"error": f"Stack file not found: {filepath}", "stack": stack}
+    try:
+        filters = parse_filters(filters, _STACK_COLS["facet_cols"])
+    except ValueError as e:
+        return {"error": str(e), "stack": stack}
 
-    results = _search_csv(filepath, _STACK_COLS["search_cols"], _STACK_COLS["output_cols"], query, max_results)
+    results, corrections = _search_csv_many(filepath, _STACK_COLS["search_cols"], _STACK_COLS["output_cols"], [query], max_results, mode, filters, dedupe)[0]
 
-    return {
+    return _response({
         "domain": "stack",
         "stack": stack,
         "query": query,
-        "file": STACK_CONFIG[stack]["file"],
-        "count": len(results),
-        "results": results
+        "file": STACK_CONFIG[stack]["file"]
+    }, results, corrections)
+
+
+def search_many(queries, domain=None, max_results=MAX_RESULTS, mode="bm25", filters=None, dedupe=False):
+    """Batch search: one index load and one sparse product per domain"""
+    error = _check_mode(mode, domain)
+    if error:
+        return [{"error": error, "domain": domain} for _ in queries]
+    if domain == "all":
+        return [search_all(query, max_results, filters, dedupe) for query in queries]
+
+    groups = defaultdict(list)
+    for pos, query in enumerate(queries):
+        groups[domain or detect_domain(query)].append(pos)
+
+    output = [None] * len(queries)
+    for name, positions in groups.items():
+        config = CSV_CONFIG.get(name, CSV_CONFIG["style"])
+        filepath = DATA_DIR / config["file"]
+        if not filepath.exists():
+            for pos in positions:
+                output[pos] = {"error": f"File not found: {filepath}", "domain": name}
+            continue
+        try:
+            parsed = parse_filters(filters, config.get("facet_cols", ()))
+        except ValueError as e:
+            for pos in positions:
+                output[pos] = {"error": str(e), "domain": name}
+            continue
+
+        batch = _search_csv_many(filepath, config["search_cols"], config["output_cols"],
+                                 [queries[pos] for pos in positions], max_results, mode, parsed, dedupe)
+        for pos, (results, corrections) in zip(positions, batch):
+            output[pos] = _response({
+                "domain": name,
+                "query": queries[pos],
+                "file": config["file"]
+            }, results, corrections)
+
+    return output
+
+
+def search_stack_many(queries, stack, max_results=MAX_RESULTS, mode="bm25", filters=None, dedupe=False):
+    """Batch version of search_stack"""
+    error = _check_mode(mode)
+    if error:
+        return [{"error": error, "stack": stack} for _ in queries]
+    if stack not in STACK_CONFIG:
+        return [{"error": f"Unknown stack: {stack}. Available: {', '.join(AVAILABLE_STACKS)}"} for _ in queries]
+
+    filepath = DATA_DIR / STACK_CONFIG[stack]["file"]
+
+    if not filepath.exists():
+        return [{"error": f"Stack file not found: {filepath}", "stack": stack} for _ in queries]
+    try:
+        filters = parse_filters(filters, _STACK_COLS["facet_cols"])
+    except ValueError as e:
+        return [{"error": str(e), "stack": stack} for _ in queries]
+
+    batch = _search_csv_many(filepath, _STACK_COLS["search_cols"], _STACK_COLS["output_cols"], queries, max_results, mode, filters, dedupe)
+
+    return [_response({
+        "domain": "stack",
+        "stack": stack,
+        "query": query,
+        "file": STACK_CONFIG[stack]["file"]
+    }, results, corrections) for query, (results, corrections) in zip(queries, batch)]
+
+
+# ============ SEARCH ENGINE ============
+class SearchEngine:
+    """Warm search session: each corpus index is loaded once and held for the engine's lifetime
+
+    Callers that issue many lookups (the design system generator, page
+    overrides) share one engine and group their lookups in a QueryPlan. It
+    holds CSV_CONFIG domains only; stacks and one-off queries go through
+    search_stack() and search(). An engine does not notice CSV edits made
+    while it is alive; create one per task rather than per process.
+    """
+
+    def __init__(self):
+        self._indexes = {}
+        self._versions = {}
+
+    def index(self, domain):
+        """CorpusIndex of a domain, loaded on first use"""
+        index = self._indexes.get(domain)
+        if index is None:
+            config = CSV_CONFIG[domain]
+            self._versions[domain] = data_version()
+            index = self._indexes[domain] = load_index(DATA_DIR / config["file"], config["search_cols"])
+        return index
+
+    def run(self, domain, queries, max_results):
+        """(results, corrections) per query, scored against the held index in one batch"""
+        config = CSV_CONFIG[domain]
+        index = self.index(domain)
+        return _search_csv_many(DATA_DIR / config["file"], config["search_cols"], config["output_cols"],
+                                queries, max_results, index=index, version=self._versions[domain])
+
+    def plan(self):
+        """Fresh QueryPlan bound to this engine"""
+        return QueryPlan(self)
+
+
+class QueryPlan:
+    """The lookups of one generation: each distinct (domain, query) runs once, at the largest k asked for
+
+    add() queues lookups; run() scores everything queued, one batch per
+    domain; get() returns a response, running the queue first. Results stay
+    memoized, so a later get() of a lookup that already ran costs nothing.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self._pending = {}
+        self._done = {}
+
+    def add(self, query, domain, max_results=MAX_RESULTS):
+        """Queue a lookup unless it already ran with at least max_results"""
+        key = (domain, _query_key(query))
+        done = self._done.get(key)
+        if done is None or done[0] < max_results:
+            self._pending[key] = max(max_results, self._pending.get(key, 0))
+        return key
+
+    def run(self):
+        """Score every queued lookup"""
+        by_domain = defaultdict(list)
+        for domain, norm in self._pending:
+            by_domain[domain].append(norm)
+        for domain, norms in by_domain.items():
+            depth = max(self._pending[(domain, norm)] for norm in norms)
+            if domain not in CSV_CONFIG or not (DATA_DIR / CSV_CONFIG[domain]["file"]).exists():
+                batch = [([], {}) for _ in norms]
+            else:
+                batch = self.engine.run(domain, norms, depth)
+            for norm, entry in zip(norms, batch):
+                self._done[(domain, norm)] = (depth, entry)
+        self._pending.clear()
+
+    def get(self, query, domain, max_results=MAX_RESULTS):
+        """Response dict of one lookup, shaped like search()"""
+        if domain not in CSV_CONFIG:
+            return {"error": f"Unknown domain: {domain}. Available: {', '.join(CSV_CONFIG)}", "domain": domain}
+        filepath = DATA_DIR / CSV_CONFIG[domain]["file"]
+        if not filepath.exists():
+            return {"error": f"File not found: {filepath}", "domain": domain}
+
+        key = self.add(query, domain, max_results)
+        if self._pending:
+            self.run()
+        results, corrections = self._done[key][1]
+        return _response({
+            "domain": domain,
+            "query": query,
+            "file": CSV_CONFIG[domain]["file"]
+        }, results[:max_results], corrections)
+
+
+# ============ AUTOCOMPLETE API ============
+def suggest(prefix, domain="style", k=MAX_SUGGESTIONS):
+    """Completions for a partially typed name or keyword: row names first, then vocabulary terms"""
+    if domain not in CSV_CONFIG:
+        return {"error": f"Unknown domain: {domain}. Available: {', '.join(CSV_CONFIG)}"}
+
+    config = CSV_CONFIG[domain]
+    filepath = DATA_DIR / config["file"]
+
+    if not filepath.exists():
+        return {"error": f"File not found: {filepath}", "domain": domain}
+
+    text = " ".join(str(prefix).lower().split())
+    matches = load_index(filepath, config["search_cols"]).prefixes(config.get("name_col")).lookup(text, k) if text else []
+    return {
+        "domain": domain,
+        "prefix": prefix,
+        "count": len(matches),
+        "suggestions": [{"text": match, "kind": kind} for match, kind in matches]
     }
+
+
+# ============ SIMILARITY API ============
+def _find_row(index, config, row_id):
+    """Row position from an int (or digit string) position or a name-column value, else None"""
+    if isinstance(row_id, int) or str(row_id).strip().isdigit():
+        row = int(row_id)
+        return row if 0 <= row < index.bm25.N else None
+    name_col = config.get("name_col")
+    if name_col not in index.store.columns:
+        return None
+    wanted = " ".join(str(row_id).lower().split())
+    for row in range(index.store.n_rows):
+        if " ".join((index.store.value(name_col, row) or "").lower().split()) == wanted:
+            return row
+    return None
+
+
+def similar(domain, row_id, target_domain, k=MAX_RESULTS):
+    """Rows of target_domain most similar in content to one row of domain, from the precomputed neighbor table
+
+    Domains are CSV_CONFIG keys or stack/<name>; row_id is the 0-based data
+    row or a value of the domain's name column ("Glassmorphism").
+    """
+    corpora = dict(all_corpora())
+    for name in (domain, target_domain):
+        if name not in corpora:
+            return {"error": f"Unknown domain: {name}. Available: {', '.join(corpora)}"}
+        if not (DATA_DIR / corpora[name]["file"]).exists():
+            return {"error": f"File not found: {DATA_DIR / corpora[name]['file']}", "domain": name}
+
+    config, target = corpora[domain], corpora[target_domain]
+    index = load_index(DATA_DIR / config["file"], config["search_cols"])
+    target_index = load_index(DATA_DIR / target["file"], target["search_cols"])
+    row = _find_row(index, config, row_id)
+    if row is None:
+        return {"error": f"No row {row_id!r} in {domain}", "domain": domain}
+
+    import neighbors
+    results = []
+    for other, score in neighbors.load_table().neighbors(domain, row, target_domain, k):
+        result = target_index.record(other, target["output_cols"])
+        result["Similarity"] = round(score, 4)
+        results.append(result)
+
+    return _response({
+        "domain": domain,
+        "row": row,
+        "target": target_domain,
+        "file": target["file"]
+    }, results, None)
+
+
+# ============ STATISTICS ============
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[rank]
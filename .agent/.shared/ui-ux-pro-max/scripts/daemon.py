@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Daemon - keeps every corpus index warm behind a Unix socket
+
+Usage:
+    python search.py serve [--socket /path/to.sock] [--watch-interval 1.0]
+
+Protocol (JSON lines, one request and one response per line):
+    -> {"op": "search", "query": "glassmorphism", "domain": "style", "max_results": 3, "mode": "bm25"}
+    -> {"op": "search", "query": "touch", "domain": "ux", "filters": {"Severity": ["High"]}, "dedupe": true}
+    -> {"op": "search_stack", "query": "forms", "stack": "react"}
+    -> {"op": "suggest", "prefix": "glass", "domain": "style", "k": 8}
+    -> {"op": "similar", "domain": "style", "row": "Glassmorphism", "target": "color", "k": 3}
+    -> {"op": "design_system", "query": "SaaS dashboard", "project_name": "Acme"}
+    -> {"op": "stats"}
+    <- {"ok": true, "result": ...}
+    <- {"ok": false, "error": "..."}
+
+Edited CSV files are picked up by a polling watcher; only the changed file is
+reindexed. Clients use request() / call(); call() falls back to in-process search when
+the daemon is not running or answers with an error.
+
+The socket lives in $XDG_RUNTIME_DIR, else in a private (0700) per-user
+directory under $TMPDIR or /tmp; $UIPRO_SOCKET or --socket override both.
+"""
+
+import os
+import stat
+from pathlib import Path
+
+import core
+
+# json, socket and the server modules are imported on use, so a client whose
+# daemon is not running pays nothing for them.
+
+
+# ============ CONFIGURATION ============
+def _private_dir():
+    """Per-user directory for the socket when there is no $XDG_RUNTIME_DIR"""
+    uid = os.getuid() if hasattr(os, "getuid") else "user"
+    return Path(os.environ.get("TMPDIR") or "/tmp") / f"ui-ux-pro-max-{uid}"
+
+
+def _default_socket():
+    """Socket in the user's runtime dir, else in the private temp dir"""
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime and os.path.isdir(runtime):
+        return Path(runtime) / "ui-ux-pro-max.sock"
+    return _private_dir() / "daemon.sock"
+
+
+SOCKET_PATH = Path(os.environ.get("UIPRO_SOCKET", _default_socket()))
+WATCH_INTERVAL = 1.0
+CONNECT_TIMEOUT = 0.2
+REQUEST_TIMEOUT = 30
+
+
+# ============ OPERATIONS ============
+def _op_search(params):
+    """Domain search"""
+    return core.search(params["query"], params.get("domain"), params.get("max_results", core.MAX_RESULTS),
+                       params.get("mode", "bm25"), params.get("filters"), params.get("dedupe", False))
+
+
+def _op_search_stack(params):
+    """Stack-specific search"""
+    return core.search_stack(params["query"], params["stack"], params.get("max_results", core.MAX_RESULTS),
+                             params.get("mode", "bm25"), params.get("filters"), params.get("dedupe", False))
+
+
+def _op_suggest(params):
+    """Prefix completions over names and keywords"""
+    return core.suggest(params["prefix"], params.get("domain", "style"), params.get("k", core.MAX_SUGGESTIONS))
+
+
+def _op_similar(params):
+    """Precomputed content neighbors of one row in another domain"""
+    return core.similar(params["domain"], params["row"], params["target"], params.get("k", core.MAX_RESULTS))
+
+
+def _op_design_system(params):
+    """Formatted design system, optionally persisted under output_dir"""
+    from design_system import generate_design_system
+    return generate_design_system(
+        params["query"],
+        params.get("project_name"),
+        params.get("format", "ascii"),
+        persist=params.get("persist", False),
+        page=params.get("page"),
+        output_dir=params.get("output_dir")
+    )
+
+
+def _op_stats(params):
+    """Result cache counters"""
+    return core.cache_info()
+
+
+def _op_ping(params):
+    """Liveness check"""
+    return "pong"
+
+
+OPERATIONS = {
+    "search": _op_search,
+    "search_stack": _op_search_stack,
+    "suggest": _op_suggest,
+    "similar": _op_similar,
+    "design_system": _op_design_system,
+    "stats": _op_stats,
+    "ping": _op_ping
+}
+
+
+def dispatch(message):
+    """Run one decoded request and build its response"""
+    op = OPERATIONS.get(message.get("op")) if isinstance(message, dict) else None
+    if op is None:
+        return {"ok": False, "error": f"Unknown op. Available: {', '.join(OPERATIONS)}"}
+    try:
+        return {"ok": True, "result": op(message)}
+    except KeyError as e:
+        return {"ok": False, "error": f"Missing parameter: {e.args[0]}"}
+    except Exception as e:
+        return {"ok": False, "error": f"{type(e).__name__}: {e}"}
+
+
+def _check_private(path):
+    """Raise OSError when a socket in the shared temp dir sits in a directory another user could control"""
+    directory = Path(path).parent
+    if directory != _private_dir() or not hasattr(os, "getuid"):
+        return
+    info = os.lstat(directory)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise OSError(f"{directory} must be a directory owned by you with mode 0700")
+
+
+# ============ SERVER ============
+def preload():
+    """Load and warm every corpus in CSV_CONFIG and STACK_CONFIG, facet bitmaps and prefix indexes included"""
+    federated = core.load_federated()
+    for _, config, index in federated.parts:
+        for column in config.get("facet_cols", ()):
+            index.store.facet(column)
+        if "name_col" in config:
+            index.prefixes(config["name_col"])
+    return len(federated.parts)
+
+
+def watch(interval=WATCH_INTERVAL):
+    """Poll data files and reindex the ones that changed (no inotify in the stdlib)"""
+    import time
+    while True:
+        time.sleep(interval)
+        changed = core.refresh()
+        if changed:
+            core.load_federated()
+            names = ", ".join(Path(f).name for f in changed)
+            print(f"ui-ux-pro-max daemon: reindexed {names}", flush=True)
+
+
+def _stop(signum, frame):
+    """Turn SIGTERM into a clean shutdown"""
+    raise KeyboardInterrupt
+
+
+def _handle(handler):
+    """Answer JSON-line requests until the client hangs up"""
+    import json
+    for line in handler.rfile:
+        if not line.strip():
+            continue
+        try:
+            response = dispatch(json.loads(line))
+        except ValueError as e:
+            response = {"ok": False, "error": f"Invalid JSON: {e}"}
+        handler.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b"\n")
+        handler.wfile.flush()
+
+
+def serve(socket_path=None, watch_interval=WATCH_INTERVAL):
+    """Preload all indexes and serve requests until interrupted"""
+    import signal
+    import socket
+    import socketserver
+    import threading
+
+    if not hasattr(socket, "AF_UNIX"):
+        raise SystemExit("Unix domain sockets are not available on this platform")
+
+    path = Path(socket_path or SOCKET_PATH)
+    try:
+        path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        _check_private(path)
+    except OSError as e:
+        raise SystemExit(f"Cannot use socket {path}: {e}")
+    if path.exists():
+        if ping(path):
+            raise SystemExit(f"Daemon already running on {path}")
+        path.unlink()
+
+    loaded = preload()
+    class Handler(socketserver.StreamRequestHandler):
+        handle = _handle
+
+    # Created 0600 from the start, not chmod'ed after bind
+    umask = os.umask(0o177)
+    try:
+        server = socketserver.ThreadingUnixStreamServer(str(path), Handler)
+    finally:
+        os.umask(umask)
+    server.daemon_threads = True
+    signal.signal(signal.SIGTERM, _stop)
+    if watch_interval:
+        threading.Thread(target=watch, args=(watch_interval,), daemon=True).start()
+    print(f"ui-ux-pro-max daemon: {loaded} corpora loaded, listening on {path}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+
+# ============ CLIENT ============
+def request(op, socket_path=None, **params):
+    """Send one request to the daemon; raises OSError if it is not reachable"""
+    import json
+    import socket
+
+    if not hasattr(socket, "AF_UNIX"):
+        raise OSError("Unix domain sockets are not available on this platform")
+
+    path = socket_path or SOCKET_PATH
+    _check_private(path)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(CONNECT_TIMEOUT)
+        sock.connect(str(path))
+        sock.settimeout(REQUEST_TIMEOUT)
+        sock.sendall(json.dumps(dict(params, op=op), ensure_ascii=False).encode('utf-8') + b"\n")
+        with sock.makefile('rb') as f:
+            line = f.readline()
+    if not line:
+        raise OSError("Daemon closed the connection")
+    response = json.loads(line)
+    if not response.get("ok"):
+        raise RuntimeError(response.get("error", "Daemon request failed"))
+    return response["result"]
+
+
+def ping(socket_path=None):
+    """True if a daemon answers on the socket"""
+    try:
+        return request("ping", socket_path) == "pong"
+    except (OSError, ValueError, RuntimeError):
+        return False
+
+
+def call(op, use_daemon=True, **params):
+    """Run an operation on the daemon, or in-process when it is not running or fails"""
+    if use_daemon and SOCKET_PATH.exists():
+        try:
+            return request(op, **params)
+        except (OSError, ValueError, RuntimeError):
+            pass
+    return OPERATIONS[op](params)
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Dedup - near-duplicate rows across the knowledge-base CSVs
+
+Usage:
+    python dedup.py                                   # clusters across every domain and stack
+    python dedup.py --corpus ux --corpus web --corpus react
+    python dedup.py --threshold 0.6 --json > dedup-report.json
+
+Each row is reduced to the set of tokens of its search columns and MinHashed
+with NUM_PERM hash functions. The signatures are cut into BANDS bands of ROWS
+values; rows that share a bucket in any band become candidate pairs, which are
+kept when the exact Jaccard similarity of their token sets reaches THRESHOLD.
+Only colliding rows are compared, so the pass is roughly linear in the number
+of rows. Kept pairs are merged into clusters with union-find.
+
+search.py --dedupe collapses each cluster to its best-ranked row at query time,
+using cluster tables cached on disk next to the indexes: one per corpus for
+single-domain searches, one across every corpus for --domain all.
+"""
+
+import argparse
+import json
+import random
+import sys
+import zlib
+from array import array
+from collections import defaultdict
+from pathlib import Path
+
+import core
+
+
+# ============ CONFIGURATION ============
+DEDUP_VERSION = 2
+THRESHOLD = 0.5
+BANDS = 24
+ROWS = 3
+NUM_PERM = BANDS * ROWS
+SEED = 20
+_PRIME = (1 << 61) - 1
+
+
+# ============ MINHASH ============
+def _permutations(count=NUM_PERM, seed=SEED):
+    """(a, b) coefficients of the universal hashes (a * x + b) mod p"""
+    rng = random.Random(seed)
+    return [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(count)]
+
+
+class MinHasher:
+    """MinHash signatures of token sets; each token is hashed once per instance"""
+
+    def __init__(self, count=NUM_PERM, seed=SEED):
+        self.permutations = _permutations(count, seed)
+        self._hashes = {}
+
+    def _token(self, token):
+        hashes = self._hashes.get(token)
+        if hashes is None:
+            x = zlib.crc32(token.encode('utf-8'))
+            hashes = self._hashes[token] = [(a * x + b) % _PRIME for a, b in self.permutations]
+        return hashes
+
+    def signature(self, tokens):
+        """Element-wise minimum of the token hashes; None for an empty set"""
+        if not tokens:
+            return None
+        hashes = [self._token(token) for token in tokens]
+        return tuple(map(min, *hashes)) if len(hashes) > 1 else tuple(hashes[0])
+
+
+def row_tokens(index):
+    """Token set of every row, read from the BM25 postings"""
+    bm25 = index.bm25
+    tokens = [set() for _ in range(bm25.N)]
+    for tid, term in enumerate(bm25.terms):
+        for pos in range(bm25.post_ptr[tid], bm25.post_ptr[tid + 1]):
+            tokens[bm25.post_docs[pos]].add(term)
+    return [frozenset(row) for row in tokens]
+
+
+def jaccard(a, b):
+    """|a & b| / |a | b| of two sets"""
+    union = len(a | b)
+    return len(a & b) / union if union else 0.0
+
+
+# ============ CLUSTERING ============
+def find_pairs(token_sets, threshold=THRESHOLD, bands=BANDS, rows=ROWS):
+    """[(i, j, jaccard)] of near-duplicate rows, found through LSH banding and checked exactly"""
+    hasher = MinHasher(bands * rows)
+    buckets = defaultdict(list)
+    for i, tokens in enumerate(token_sets):
+        signature = hasher.signature(tokens)
+        if signature is None:
+            continue
+        for band in range(bands):
+            buckets[(band, signature[band * rows:(band + 1) * rows])].append(i)
+
+    candidates = set()
+    for members in buckets.values():
+        for pos, i in enumerate(members):
+            for j in members[pos + 1:]:
+                candidates.add((i, j))
+
+    pairs = []
+    for i, j in sorted(candidates):
+        similarity = jaccard(token_sets[i], token_sets[j])
+        if similarity >= threshold:
+            pairs.append((i, j, similarity))
+    return pairs
+
+
+def clusters(count, pairs):
+    """Union-find over the pairs: cluster id per item (-1 when it has no duplicate)"""
+    parent = list(range(count))
+
+    def root(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j, _ in pairs:
+        ri, rj = root(i), root(j)
+        if ri != rj:
+            parent[max(ri, rj)] = min(ri, rj)
+
+    ids, labels = {}, array('i', [-1] * count)
+    for i, j, _ in pairs:
+        for item in (i, j):
+            labels[item] = ids.setdefault(root(item), len(ids))
+    return labels
+
+
+def analyze(parts, threshold=THRESHOLD):
+    """Rows, near-duplicate pairs and cluster labels of (source, config, CorpusIndex) parts
+
+    rows holds one (source, row, token set) per row of every part, in order;
+    pairs and labels index into it.
+    """
+    rows = []
+    for source, _, index in parts:
+        rows.extend((source, row, tokens) for row, tokens in enumerate(row_tokens(index)))
+    pairs = find_pairs([tokens for _, _, tokens in rows], threshold)
+    return rows, pairs, clusters(len(rows), pairs)
+
+
+# ============ QUERY-TIME COLLAPSING ============
+class ClusterTable:
+    """Cluster id of every row, per data file (-1 for rows without a near duplicate)"""
+
+    def __init__(self, labels):
+        self.labels = labels
+
+    def of(self, filepath):
+        """Per-row cluster ids of a data file, or None if it was not analyzed"""
+        return self.labels.get(_file_key(filepath))
+
+
+def _file_key(filepath):
+    """Data-relative name of a CSV"""
+    try:
+        return Path(filepath).relative_to(core.DATA_DIR).as_posix()
+    except ValueError:
+        return str(filepath)
+
+
+def collapse(hits, cluster_of, k):
+    """Top k of ranked (key, score) hits, keeping only the best-ranked hit of each cluster"""
+    seen, kept = set(), []
+    for key, score in hits:
+        cluster = cluster_of(key)
+        if cluster >= 0:
+            if cluster in seen:
+                continue
+            seen.add(cluster)
+        kept.append((key, score))
+        if len(kept) == k:
+            break
+    return kept
+
+
+_TABLES = {}
+
+
+def _corpus_part(filepath):
+    """[(source, config, CorpusIndex)] of the corpus stored in filepath (empty if it is not one)"""
+    key = _file_key(filepath)
+    for source, config in core.all_corpora():
+        if config["file"] == key:
+            return [(source, config, core.load_index(Path(filepath), config["search_cols"]))]
+    return []
+
+
+def load_clusters(filepath=None):
+    """ClusterTable of one corpus (or of every corpus when filepath is None)
+
+    Memoized per data version, else read from the cache, else computed.
+    """
+    key = _file_key(filepath) if filepath is not None else None
+    version = core.data_version()
+    memo = _TABLES.get(key)
+    if memo and memo[0] == version:
+        return memo[1]
+
+    if key is None:
+        parts, name = core.load_all(), "clusters.dup"
+    else:
+        parts, name = _corpus_part(filepath), f"clusters-{Path(key).with_suffix('').as_posix().replace('/', '-')}.dup"
+    digest = core.corpora_digest(parts)
+    path = core.CACHE_DIR / name
+    payload = core._read_cache(path, DEDUP_VERSION)
+    if payload and payload.get("digest") == digest and payload.get("threshold") == THRESHOLD:
+        labels = payload["labels"]
+    else:
+        _, _, flat = analyze(parts)
+        labels, start = {}, 0
+        for _, config, index in parts:
+            labels[config["file"]] = flat[start:start + index.bm25.N]
+            start += index.bm25.N
+        core._write_pickle(path, {"version": DEDUP_VERSION, "digest": digest, "threshold": THRESHOLD, "labels": labels})
+
+    table = ClusterTable(labels)
+    _TABLES[key] = (core.data_version(), table)
+    return table
+
+
+# ============ REPORT ============
+def _name(config, index, row):
+    """Human-readable label of a row"""
+    name_col = config.get("name_col")
+    return (index.store.value(name_col, row) or "") if name_col in index.store.columns else ""
+
+
+def report(parts, threshold=THRESHOLD):
+    """Dedup report: totals, duplicate counts per corpus pair and every cluster with its members"""
+    rows, pairs, labels = analyze(parts, threshold)
+    lookup = {source: (config, index) for source, config, index in parts}
+
+    members = defaultdict(list)
+    for item, label in enumerate(labels):
+        if label >= 0:
+            members[label].append(item)
+    best = defaultdict(float)
+    for i, j, similarity in pairs:
+        best[i] = max(best[i], similarity)
+        best[j] = max(best[j], similarity)
+
+    by_pair = defaultdict(int)
+    for i, j, _ in pairs:
+        by_pair[" + ".join(sorted({rows[i][0], rows[j][0]}))] += 1
+
+    listing = []
+    for label in sorted(members, key=lambda label: (-len(members[label]), label)):
+        listing.append([{
+            "source": rows[item][0],
+            "row": rows[item][1],
+            "name": _name(*lookup[rows[item][0]], rows[item][1]),
+            "jaccard": round(best[item], 3)
+        } for item in members[label]])
+
+    clustered = sum(len(group) for group in listing)
+    return {
+        "threshold": threshold,
+        "rows": len(rows),
+        "pairs": len(pairs),
+        "clusters": len(listing),
+        "clustered_rows": clustered,
+        "redundant_rows": clustered - len(listing),
+        "by_corpus_pair": dict(sorted(by_pair.items(), key=lambda item: -item[1])),
+        "members": listing
+    }
+
+
+def format_report(result):
+    """Plain-text version of report()"""
+    lines = [
+        f"{result['rows']} rows, {result['pairs']} near-duplicate pairs (Jaccard >= {result['threshold']})",
+        f"{result['clusters']} clusters covering {result['clustered_rows']} rows; "
+        f"{result['redundant_rows']} rows are redundant",
+        "",
+        "Pairs per corpus:"
+    ]
+    lines.extend(f"  {count:>4}  {pair}" for pair, count in result["by_corpus_pair"].items())
+    for number, group in enumerate(result["members"], 1):
+        lines.append("")
+        lines.append(f"Cluster {number} ({len(group)} rows)")
+        lines.extend(f"  {m['source']:<22} #{m['row']:<4} {m['jaccard']:.2f}  {m['name']}" for m in group)
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="UI Pro Max Near-Duplicate Report")
+    parser.add_argument("--corpus", "-c", action="append", default=None, help="Only these corpora (domain or stack/<name>); repeatable")
+    parser.add_argument("--threshold", "-t", type=float, default=THRESHOLD, help=f"Minimum Jaccard similarity (default: {THRESHOLD})")
+    parser.add_argument("--json", action="store_true", help="Output as JSON")
+    args = parser.parse_args(argv)
+
+    parts = [part for part in core.load_all() if not args.corpus or part[0] in args.corpus]
+    if not parts:
+        print("No matching corpora", file=sys.stderr)
+        return 1
+
+    result = report(parts, args.threshold)
+    if args.json:
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+    else:
+        print(format_report(result))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -11,14 +11,24 @@ Usage:
     # With persistence (Master + Overrides pattern)
     result = generate_design_system("SaaS dashboard", "My Project", persist=True)
     result = generate_design_system("SaaS dashboard", "My Project", persist=True, page="dashboard")
+
+    # Several pages from one warm engine: every corpus is loaded once
+    engine = SearchEngine()
+    design_system = DesignSystemGenerator(engine).generate("SaaS dashboard", "My Project")
+    for page in ["dashboard", "settings", "checkout"]:
+        persist_design_system(design_system, page, page_query="SaaS dashboard", engine=engine)
+
+    # Every page of every project in a manifest (see build_manifest)
+    results = build_manifest(load_manifest("pages.yaml"))
 """
 
 import csv
 import json
 import os
+import time
 from datetime import datetime
 from pathlib import Path
-from core import search, DATA_DIR
+from core import SearchEngine, DATA_DIR, _file_signature
 
 
 # ============ CONFIGURATION ============
@@ -32,64 +42,113 @@ SEARCH_CONFIG = {
     "typography": {"max_results": 2}
 }
 
+# Lookups behind every page override: (domain, max_results)
+PAGE_LOOKUPS = (("style", 1), ("ux", 3), ("landing", 1))
+
+# Manifests with at least this many projects go to a process pool by default;
+# below that, one warm in-process engine beats the pool's startup cost
+POOL_MIN_PROJECTS = 32
+
+
+# ============ REASONING INDEX ============
+class ReasoningIndex:
+    """Reasoning rules compiled once for category lookups.
+
+    Keeps the first-match order of the original three passes: exact category,
+    then substring either way, then any category word found in the query.
+    """
+
+    def __init__(self, rules: list):
+        self.rules = rules
+        self.exact = {}
+        self.candidates = []
+        self.keywords = {}
+        for pos, rule in enumerate(rules):
+            ui_cat = rule.get("UI_Category", "").lower()
+            self.exact.setdefault(ui_cat, pos)
+            self.candidates.append(ui_cat)
+            for kw in ui_cat.replace("/", " ").replace("-", " ").split():
+                self.keywords.setdefault(kw, pos)
+        self._decisions = {}
+        self._found = {}
+
+    def find(self, category: str):
+        """Position of the rule for a category, or None."""
+        category_lower = category.lower()
+        if category_lower in self._found:
+            return self._found[category_lower]
+
+        pos = self.exact.get(category_lower)
+        if pos is None:
+            pos = next((i for i, ui_cat in enumerate(self.candidates)
+                        if ui_cat in category_lower or category_lower in ui_cat), None)
+        if pos is None:
+            pos = min((first for kw, first in self.keywords.items() if kw in category_lower), default=None)
+        self._found[category_lower] = pos
+        return pos
+
+    def decision_rules(self, pos: int) -> dict:
+        """Parsed Decision_Rules JSON of a rule ({} if malformed)."""
+        if pos not in self._decisions:
+            try:
+                self._decisions[pos] = json.loads(self.rules[pos].get("Decision_Rules", "{}"))
+            except json.JSONDecodeError:
+                self._decisions[pos] = {}
+        rules = self._decisions[pos]
+        return dict(rules) if isinstance(rules, dict) else rules
+
+
+_REASONING = {}
+
+
+def load_reasoning_index() -> ReasoningIndex:
+    """ReasoningIndex for ui-reasoning.csv, rebuilt only when the file changes."""
+    filepath = DATA_DIR / REASONING_FILE
+    try:
+        signature = (filepath, _file_signature(filepath))
+    except OSError:
+        return ReasoningIndex([])
+    if _REASONING.get("signature") != signature:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            _REASONING["index"] = ReasoningIndex(list(csv.DictReader(f)))
+        _REASONING["signature"] = signature
+    return _REASONING["index"]
+
 
 # ============ DESIGN SYSTEM GENERATOR ============
 class DesignSystemGenerator:
     """Generates design system recommendations from aggregated searches."""
 
-    def __init__(self):
-        self.reasoning_data = self._load_reasoning()
-
-    def _load_reasoning(self) -> list:
-        """Load reasoning rules from CSV."""
-        filepath = DATA_DIR / REASONING_FILE
-        if not filepath.exists():
-            return []
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return list(csv.DictReader(f))
+    def __init__(self, engine: SearchEngine = None):
+        self.engine = engine or SearchEngine()
+        self.reasoning = load_reasoning_index()
+        self.reasoning_data = self.reasoning.rules
 
-    def _multi_domain_search(self, query: str, style_priority: list = None) -> dict:
-        """Execute searches across multiple domains."""
-        results = {}
+    def _multi_domain_search(self, query: str, style_priority: list = None, plan=None) -> dict:
+        """Execute searches across multiple domains as one plan (lookups already in it are reused)."""
+        plan = plan or self.engine.plan()
+        lookups = {}
         for domain, config in SEARCH_CONFIG.items():
             if domain == "style" and style_priority:
                 # For style, also search with priority keywords
                 priority_query = " ".join(style_priority[:2]) if style_priority else query
-                combined_query = f"{query} {priority_query}"
-                results[domain] = search(combined_query, domain, config["max_results"])
+                lookups[domain] = f"{query} {priority_query}"
             else:
-                results[domain] = search(query, domain, config["max_results"])
-        return results
+                lookups[domain] = query
+            plan.add(lookups[domain], domain, config["max_results"])
+        plan.run()
+        return {domain: plan.get(text, domain, SEARCH_CONFIG[domain]["max_results"]) for domain, text in lookups.items()}
 
     def _find_reasoning_rule(self, category: str) -> dict:
         """Find matching reasoning rule for a category."""
-        category_lower = category.lower()
-
-        # Try exact match first
-        for rule in self.reasoning_data:
-            if rule.get("UI_Category", "").lower() == category_lower:
-                return rule
-
-        # Try partial match
-        for rule in self.reasoning_data:
-            ui_cat = rule.get("UI_Category", "").lower()
-            if ui_cat in category_lower or category_lower in ui_cat:
-                return rule
-
-        # Try keyword match
-        for rule in self.reasoning_data:
-            ui_cat = rule.get("UI_Category", "").lower()
-            keywords = ui_cat.replace("/", " ").replace("-", " ").split()
-            if any(kw in category_lower for kw in keywords):
-                return rule
-
-        return {}
+        pos = self.reasoning.find(category)
+        return self.reasoning_data[pos] if pos is not None else {}
 
     def _apply_reasoning(self, category: str, search_results: dict) -> dict:
         """Apply reasoning rules to search results."""
-        rule = self._find_reasoning_rule(category)
+        pos = self.reasoning.find(category)
 
-        if not rule:
+        if pos is None:
             return {
                 "pattern": "Hero + Features + CTA",
                 "style_priority": ["Minimalism", "Flat Design"],
@@ -101,13 +160,7 @@ class DesignSystemGenerator:
                 "severity": "MEDIUM"
             }
 
-        # Parse decision rules JSON
-        decision_rules = {}
-        try:
-            decision_rules = json.loads(rule.get("Decision_Rules", "{}"))
-        except json.JSONDecodeError:
-            pass
-
+        rule = self.reasoning_data[pos]
         return {
             "pattern": rule.get("Recommended_Pattern", ""),
             "style_priority": [s.strip() for s in rule.get("Style_Priority", "").split("+")],
@@ -115,7 +168,7 @@ class DesignSystemGenerator:
             "typography_mood": rule.get("Typography_Mood", ""),
             "key_effects": rule.get("Key_Effects", ""),
             "anti_patterns": rule.get("Anti_Patterns", ""),
-            "decision_rules": decision_rules,
+            "decision_rules": self.reasoning.decision_rules(pos),
             "severity": rule.get("Severity", "MEDIUM")
         }
 
@@ -162,8 +215,10 @@ class DesignSystemGenerator:
 
     def generate(self, query: str, project_name: str = None) -> dict:
         """Generate complete design system recommendation."""
+        plan = self.engine.plan()
+
         # Step 1: First search product to get category
-        product_result = search(query, "product", 1)
+        product_result = plan.get(query, "product", 1)
         product_results = product_result.get("results", [])
         category = "General"
         if product_results:
@@ -173,9 +228,9 @@ class DesignSystemGenerator:
         reasoning = self._apply_reasoning(category, {})
         style_priority = reasoning.get("style_priority", [])
 
-        # Step 3: Multi-domain search with style priority hints
-        search_results = self._multi_domain_search(query, style_priority)
-        search_results["product"] = product_result  # Reuse product search
+        # Step 3: Multi-domain search with style priority hints (the product
+        # lookup is already in the plan and is not run again)
+        search_results = self._multi_domain_search(query, style_priority, plan)
 
         # Step 4: Select best matches from each domain using priority
         style_results = self._extract_results(search_results.get("style", {}))
@@ -460,7 +515,8 @@ def format_markdown(design_system: dict) -> str:
 
 # ============ MAIN ENTRY POINT ============
 def generate_design_system(query: str, project_name: str = None, output_format: str = "ascii", 
-                           persist: bool = False, page: str = None, output_dir: str = None) -> str:
+                           persist: bool = False, page: str = None, output_dir: str = None,
+                           engine: SearchEngine = None) -> str:
     """
     Main entry point for design system generation.
 
@@ -471,16 +527,18 @@ def generate_design_system(query: str, project_name: str = None, output_format:
         persist: If True, save design system to design-system/ folder
         page: Optional page name for page-specific override file
         output_dir: Optional output directory (defaults to current working directory)
+        engine: Optional warm SearchEngine shared with other generations
 
     Returns:
         Formatted design system string
     """
-    generator = DesignSystemGenerator()
+    engine = engine or SearchEngine()
+    generator = DesignSystemGenerator(engine)
     design_system = generator.generate(query, project_name)
     
     # Persist to files if requested
     if persist:
-        persist_design_system(design_system, page, output_dir, query)
+        persist_design_system(design_system, page, output_dir, query, engine)
 
     if output_format == "markdown":
         return format_markdown(design_system)
@@ -488,7 +546,13 @@ def generate_design_system(query: str, project_name: str = None, output_format:
 
 
 # ============ PERSISTENCE FUNCTIONS ============
-def persist_design_system(design_system: dict, page: str = None, output_dir: str = None, page_query: str = None) -> dict:
+def _slug(name: str) -> str:
+    """Directory or file name persist_design_system() derives from a project or page name."""
+    return name.lower().replace(' ', '-')
+
+
+def persist_design_system(design_system: dict, page: str = None, output_dir: str = None, page_query: str = None,
+                          engine: SearchEngine = None) -> dict:
     """
     Persist design system to design-system/<project>/ folder using Master + Overrides pattern.
     
@@ -497,6 +561,7 @@ def persist_design_system(design_system: dict, page: str = None, output_dir: str
         page: Optional page name for page-specific override file
         output_dir: Optional output directory (defaults to current working directory)
         page_query: Optional query string for intelligent page override generation
+        engine: Optional warm SearchEngine for the page override lookups
     
     Returns:
         dict with created file paths and status
@@ -505,7 +570,7 @@ def persist_design_system(design_system: dict, page: str = None, output_dir: str
     
     # Use project name for project-specific folder
     project_name = design_system.get("project_name", "default")
-    project_slug = project_name.lower().replace(' ', '-')
+    project_slug = _slug(project_name)
     
     design_system_dir = base_dir / "design-system" / project_slug
     pages_dir = design_system_dir / "pages"
@@ -526,11 +591,7 @@ def persist_design_system(design_system: dict, page: str = None, output_dir: str
     
     # If page is specified, create page override file with intelligent content
     if page:
-        page_file = pages_dir / f"{page.lower().replace(' ', '-')}.md"
-        page_content = format_page_override_md(design_system, page, page_query)
-        with open(page_file, 'w', encoding='utf-8') as f:
-            f.write(page_content)
-        created_files.append(str(page_file))
+        created_files.append(write_page_override(design_system, page, design_system_dir, page_query, engine))
     
     return {
         "status": "success",
@@ -539,6 +600,18 @@ def persist_design_system(design_system: dict, page: str = None, output_dir: str
     }
 
 
+def write_page_override(design_system: dict, page: str, design_system_dir, page_query: str = None,
+                        engine: SearchEngine = None) -> str:
+    """Write pages/<page>.md under a persisted design system; returns its path."""
+    pages_dir = Path(design_system_dir) / "pages"
+    pages_dir.mkdir(parents=True, exist_ok=True)
+    page_file = pages_dir / f"{_slug(page)}.md"
+    page_content = format_page_override_md(design_system, page, page_query, engine)
+    with open(page_file, 'w', encoding='utf-8') as f:
+        f.write(page_content)
+    return str(page_file)
+
+
 def format_master_md(design_system: dict) -> str:
     """Format design system as MASTER.md with hierarchical override logic."""
     project = design_system.get("project_name", "PROJECT")
@@ -802,14 +875,15 @@ def format_master_md(design_system: dict) -> str:
     return "\n".join(lines)
 
 
-def format_page_override_md(design_system: dict, page_name: str, page_query: str = None) -> str:
+def format_page_override_md(design_system: dict, page_name: str, page_query: str = None,
+                            engine: SearchEngine = None) -> str:
     """Format a page-specific override file with intelligent AI-generated content."""
     project = design_system.get("project_name", "PROJECT")
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     page_title = page_name.replace("-", " ").replace("_", " ").title()
     
     # Detect page type and generate intelligent overrides
-    page_overrides = _generate_intelligent_overrides(page_name, page_query, design_system)
+    page_overrides = _generate_intelligent_overrides(page_name, page_query, design_system, engine)
     
     lines = []
     
@@ -911,23 +985,23 @@ def format_page_override_md(design_system: dict, page_name: str, page_query: str
     return "\n".join(lines)
 
 
-def _generate_intelligent_overrides(page_name: str, page_query: str, design_system: dict) -> dict:
+def _generate_intelligent_overrides(page_name: str, page_query: str, design_system: dict,
+                                    engine: SearchEngine = None) -> dict:
     """
     Generate intelligent overrides based on page type using layered search.
     
     Uses the existing search infrastructure to find relevant style, UX, and layout
     data instead of hardcoded page types.
     """
-    from core import search
-    
-    page_lower = page_name.lower()
-    query_lower = (page_query or "").lower()
-    combined_context = f"{page_lower} {query_lower}"
+    combined_context = _page_context(page_name, page_query)
     
-    # Search across multiple domains for page-specific guidance
-    style_search = search(combined_context, "style", max_results=1)
-    ux_search = search(combined_context, "ux", max_results=3)
-    landing_search = search(combined_context, "landing", max_results=1)
+    # Search across multiple domains for page-specific guidance, as one plan
+    plan = (engine or SearchEngine()).plan()
+    for domain, max_results in PAGE_LOOKUPS:
+        plan.add(combined_context, domain, max_results)
+    style_search = plan.get(combined_context, "style", 1)
+    ux_search = plan.get(combined_context, "ux", 3)
+    landing_search = plan.get(combined_context, "landing", 1)
     
     # Extract results from search response
     style_results = style_search.get("results", [])
@@ -1017,6 +1091,11 @@ def _generate_intelligent_overrides(page_name: str, page_query: str, design_syst
     }
 
 
+def _page_context(page_name: str, page_query: str = None) -> str:
+    """Search text of a page override: page name plus page query."""
+    return f"{page_name.lower()} {(page_query or '').lower()}"
+
+
 def _detect_page_type(context: str, style_results: list) -> str:
     """Detect page type from context and search results."""
     context_lower = context.lower()
@@ -1052,6 +1131,174 @@ def _detect_page_type(context: str, style_results: list) -> str:
     return "General"
 
 
+# ============ MANIFEST (BATCH GENERATION) ============
+def _manifest_name(value, what: str) -> str:
+    """A project or page name that is safe to use as one path component."""
+    if not isinstance(value, str) or not value.strip():
+        raise ValueError(f"{what} needs a non-empty name")
+    if "/" in value or "\\" in value or ".." in value:
+        raise ValueError(f"{what}: name {value!r} may not contain '/', '\\' or '..'")
+    return value.strip()
+
+
+def _normalize_manifest(data, base_dir: Path) -> dict:
+    """Validated {"output_dir", "projects": [{"name", "query", "pages": [{"name", "query"}]}]}."""
+    if not isinstance(data, dict):
+        raise ValueError("A manifest is a mapping with a projects list, or one project's name, query and pages")
+    projects = data["projects"] if "projects" in data else [data]
+    if not isinstance(projects, list) or not projects:
+        raise ValueError("The manifest lists no projects")
+
+    normalized = []
+    seen_projects = set()
+    for number, project in enumerate(projects, 1):
+        if not isinstance(project, dict) or not isinstance(project.get("query"), str) or not project["query"].strip():
+            raise ValueError(f"Project {number} needs a query")
+        name = _manifest_name(project["name"], f"Project {number}") if project.get("name") is not None else None
+        # Two projects writing one folder would race on MASTER.md in the process pool
+        folder = _slug(name or project["query"].upper())
+        if folder in seen_projects:
+            raise ValueError(f"Project {number} writes to design-system/{folder}/ like an earlier project; give it another name")
+        seen_projects.add(folder)
+
+        raw_pages = project.get("pages") or []
+        if not isinstance(raw_pages, list):
+            raise ValueError(f"Project {number}: pages must be a list of page names")
+        pages, seen_pages = [], set()
+        for page in raw_pages:
+            page_name, query = (page.get("name"), page.get("query")) if isinstance(page, dict) else (page, None)
+            page_name = _manifest_name(page_name, f"A page of project {number}")
+            if query is not None and not isinstance(query, str):
+                raise ValueError(f"Page {page_name!r} of project {number} has a query that is not a string")
+            if _slug(page_name) in seen_pages:
+                raise ValueError(f"Project {number} lists page {page_name!r} twice")
+            seen_pages.add(_slug(page_name))
+            # Like --page, a page is searched with the project query unless it has its own
+            pages.append({"name": page_name, "query": query or project["query"]})
+        normalized.append({"name": name, "query": project["query"], "pages": pages})
+
+    output_dir = data.get("output_dir")
+    return {"output_dir": str(base_dir / str(output_dir)) if output_dir else None, "projects": normalized}
+
+
+def load_manifest(path) -> dict:
+    """
+    Read a page manifest for build_manifest().
+
+    .yaml/.yml files need PyYAML; anything else is read as JSON with the same
+    keys:
+
+        output_dir: ..            # optional, relative to the manifest
+        projects:
+          - name: Garagem
+            query: automotive repair workshop admin
+            pages:
+              - Dashboard
+              - name: Agendamentos
+                query: appointment booking calendar
+
+    A single project may also be given at the top level (name, query, pages).
+    Raises ValueError for a malformed manifest.
+    """
+    path = Path(path)
+    if path.suffix.lower() in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError(f"{path} is YAML, which needs PyYAML (pip install pyyaml); or write the manifest as JSON") from None
+        try:
+            data = yaml.safe_load(path.read_text(encoding='utf-8'))
+        except yaml.YAMLError as e:
+            raise ValueError(f"Invalid manifest {path}: {e}") from e
+    else:
+        try:
+            data = json.loads(path.read_text(encoding='utf-8'))
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid manifest {path} (expected JSON): {e}") from e
+    return _normalize_manifest(data, path.parent)
+
+
+def _elapsed_ms(start: float) -> float:
+    """Milliseconds since a perf_counter() reading."""
+    return (time.perf_counter() - start) * 1000
+
+
+def build_project(project: dict, output_dir: str = None, engine: SearchEngine = None) -> dict:
+    """Persist one manifest project: MASTER.md once, then every page override, timed in ms."""
+    engine = engine or SearchEngine()
+    start = time.perf_counter()
+    design_system = DesignSystemGenerator(engine).generate(project["query"], project["name"])
+    persisted = persist_design_system(design_system, None, output_dir, engine=engine)
+    master_ms = _elapsed_ms(start)
+
+    # Score the lookups of every page together, one batch per domain; each
+    # override below then reads its results from the result cache
+    start = time.perf_counter()
+    plan = engine.plan()
+    for page in project["pages"]:
+        for domain, max_results in PAGE_LOOKUPS:
+            plan.add(_page_context(page["name"], page["query"]), domain, max_results)
+    plan.run()
+    lookups_ms = _elapsed_ms(start)
+
+    pages = []
+    for page in project["pages"]:
+        start = time.perf_counter()
+        path = write_page_override(design_system, page["name"], persisted["design_system_dir"], page["query"], engine)
+        pages.append({"page": page["name"], "file": path, "ms": _elapsed_ms(start)})
+
+    return {
+        "project": design_system["project_name"],
+        "design_system_dir": persisted["design_system_dir"],
+        "master_ms": master_ms,
+        "lookups_ms": lookups_ms,
+        "pages": pages
+    }
+
+
+def _build_project_job(job: tuple) -> dict:
+    """Process-pool entry point: one project on the worker's own engine."""
+    project, output_dir = job
+    return build_project(project, output_dir)
+
+
+def build_manifest(manifest: dict, output_dir: str = None, workers: int = None) -> list:
+    """
+    Persist every project of a manifest (see load_manifest); one result per project.
+
+    workers=1 builds in-process on one warm engine, workers > 1 uses a
+    process pool of that size (each worker with its own engine). By default
+    the pool (CPU count workers) is used from POOL_MIN_PROJECTS projects on.
+    """
+    output_dir = output_dir or manifest.get("output_dir")
+    projects = manifest["projects"]
+    if workers == 1 or len(projects) == 1 or (workers is None and len(projects) < POOL_MIN_PROJECTS):
+        engine = SearchEngine()
+        return [build_project(project, output_dir, engine) for project in projects]
+
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=min(workers or os.cpu_count() or 1, len(projects))) as pool:
+        return list(pool.map(_build_project_job, [(project, output_dir) for project in projects]))
+
+
+def format_manifest_summary(results: list) -> str:
+    """Timing summary of build_manifest(): one line per page, a total per project."""
+    lines = []
+    for result in results:
+        total = result["master_ms"] + result["lookups_ms"] + sum(page["ms"] for page in result["pages"])
+        lines.append(f"{result['project']} -> {result['design_system_dir']}")
+        lines.append(f"  {'MASTER.md':<32} {result['master_ms']:>9.1f} ms")
+        if result["pages"]:
+            lines.append(f"  {'page lookups (batched)':<32} {result['lookups_ms']:>9.1f} ms")
+        for page in result["pages"]:
+            lines.append(f"  {'pages/' + Path(page['file']).name:<32} {page['ms']:>9.1f} ms")
+        lines.append(f"  {'total':<32} {total:>9.1f} ms")
+        lines.append("")
+    pages = sum(len(result["pages"]) for result in results)
+    lines.append(f"{len(results)} projects, {pages} page overrides")
+    return "\n".join(lines)
+
+
 # ============ CLI SUPPORT ============
 if __name__ == "__main__":
     import argparse
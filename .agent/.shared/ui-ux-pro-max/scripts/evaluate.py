@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Evaluate - relevance and latency of the BM25 settings against labeled queries
+
+Usage:
+    python evaluate.py                                  # current settings, every labeled corpus
+    python evaluate.py --sweep --workers 4              # grid over k1, b, min_len and stopwords
+    python evaluate.py --sweep --output eval-report.json
+
+Labels live in ui-ux-pro-max/eval/ with the same file names as data/
+(eval/styles.csv, eval/stacks/react.csv). Columns:
+    query     - the search text
+    expected  - first-column ids ("No"/"STT") of the relevant rows, separated by "|"
+
+A sweep scores every combination in a process pool and recommends, per corpus,
+the setting with the best nDCG@k (then MRR, then the current setting), as a
+"bm25" entry to add to that corpus in CSV_CONFIG / STACK_CONFIG. A corpus'
+BM25F field weights are kept fixed across its sweep.
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from math import log2
+from pathlib import Path
+
+import core
+
+
+# ============ CONFIGURATION ============
+EVAL_DIR = Path(__file__).parent.parent / "eval"
+K = 5
+MIN_GAIN = 0.01
+K1_GRID = [0.6, 0.9, 1.2, 1.5, 2.0]
+B_GRID = [0.0, 0.25, 0.5, 0.75, 1.0]
+MIN_LEN_GRID = [2, 3]
+STOPWORDS = {
+    "none": [],
+    "english": ["and", "are", "but", "can", "for", "from", "has", "have", "into", "its", "not",
+                "that", "the", "their", "this", "use", "was", "with", "you", "your"]
+}
+
+
+# ============ LABELS ============
+def load_labels(path):
+    """[(query, {relevant ids})] from a labeled CSV"""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return [
+            (row["query"], {value.strip() for value in row["expected"].split("|") if value.strip()})
+            for row in csv.DictReader(f) if row.get("query")
+        ]
+
+
+def labeled_corpora():
+    """(source, config, labels path) for every corpus that has a label file"""
+    found = []
+    for source, config in core.all_corpora():
+        path = EVAL_DIR / config["file"]
+        if path.exists() and (core.DATA_DIR / config["file"]).exists():
+            found.append((source, config, path))
+    return found
+
+
+# ============ METRICS ============
+def ndcg(ranked, relevant, k):
+    """Binary-relevance nDCG@k"""
+    dcg = sum(1 / log2(rank + 2) for rank, row in enumerate(ranked[:k]) if row in relevant)
+    ideal = sum(1 / log2(rank + 2) for rank in range(min(k, len(relevant))))
+    return dcg / ideal if ideal else 0.0
+
+
+def reciprocal_rank(ranked, relevant, k):
+    """1 / rank of the first relevant row within the top k, else 0"""
+    for rank, row in enumerate(ranked[:k], 1):
+        if row in relevant:
+            return 1 / rank
+    return 0.0
+
+
+def evaluate(job):
+    """Score one (corpus, settings) pair; runs in a worker process"""
+    source, filepath, search_cols, labels, params, k = job
+    with open(filepath, 'rb') as f:
+        index = core._build_index(f.read(), search_cols, params)
+    id_col = index.header[0]
+
+    ndcgs, rrs, latencies = [], [], []
+    for query, relevant in labels:
+        start = time.perf_counter()
+        text, _ = index.bm25.correct(query)
+        hits = index.bm25.score(text, k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        ranked = [index.store.value(id_col, idx) for idx, score in hits if score > 0]
+        ndcgs.append(ndcg(ranked, relevant, k))
+        rrs.append(reciprocal_rank(ranked, relevant, k))
+
+    count = len(labels) or 1
+    return {
+        "source": source,
+        "params": params,
+        "queries": len(labels),
+        f"ndcg@{k}": round(sum(ndcgs) / count, 4),
+        f"mrr@{k}": round(sum(rrs) / count, 4),
+        "p50_ms": round(core.percentile(latencies, 50), 4) if latencies else 0.0,
+        "p95_ms": round(core.percentile(latencies, 95), 4) if latencies else 0.0
+    }
+
+
+# ============ SWEEP ============
+def grid():
+    """Every combination of the sweep settings"""
+    return [
+        {"k1": k1, "b": b, "min_len": min_len, "stopwords": STOPWORDS[stop]}
+        for k1, b, min_len, stop in itertools.product(K1_GRID, B_GRID, MIN_LEN_GRID, STOPWORDS)
+    ]
+
+
+def run(corpora, settings, k, workers):
+    """Evaluate settings(filepath) for every corpus; settings returns a list of params dicts"""
+    jobs = []
+    for source, config, path in corpora:
+        filepath = core.DATA_DIR / config["file"]
+        labels = load_labels(path)
+        for params in settings(filepath):
+            jobs.append((source, str(filepath), config["search_cols"], labels, params, k))
+    if workers == 1:
+        return [evaluate(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(evaluate, jobs, chunksize=max(1, len(jobs) // (4 * (workers or 4)))))
+
+
+def recommend(results, current, k):
+    """Best setting per corpus, kept at the current one unless nDCG improves by MIN_GAIN"""
+    metric, mrr = f"ndcg@{k}", f"mrr@{k}"
+    by_source = {}
+    for result in results:
+        by_source.setdefault(result["source"], []).append(result)
+
+    report = {}
+    for source, rows in by_source.items():
+        baseline = next(row for row in rows if row["params"] == current[source])
+        best = max(rows, key=lambda row: (row[metric], row[mrr], row["params"] == current[source], -row["p50_ms"]))
+        if best[metric] - baseline[metric] < MIN_GAIN:
+            best = baseline
+        report[source] = {"current": baseline, "recommended": best, "changed": best is not baseline}
+    return report
+
+
+def format_report(report, k):
+    """Plain-text summary plus the config entries to apply"""
+    metric, mrr = f"ndcg@{k}", f"mrr@{k}"
+    lines = [f"{'corpus':<24} {'queries':>7} {metric:>16} {mrr:>16} {'p50 ms':>8}"]
+    for source, entry in report.items():
+        cur, rec = entry["current"], entry["recommended"]
+        lines.append(f"{source:<24} {cur['queries']:>7} {cur[metric]:>7.3f} -> {rec[metric]:<6.3f} "
+                     f"{cur[mrr]:>7.3f} -> {rec[mrr]:<6.3f} {rec['p50_ms']:>8.3f}")
+
+    changes = [(source, entry["recommended"]["params"]) for source, entry in report.items() if entry["changed"]]
+    lines.append("")
+    if not changes:
+        lines.append("Current settings are already the best found; no config change recommended.")
+    else:
+        lines.append("Recommended config entries:")
+        for source, params in changes:
+            lines.append(f'  {source}: "bm25": {json.dumps(params)}')
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="UI Pro Max Relevance Evaluation")
+    parser.add_argument("--sweep", action="store_true", help="Grid search over k1, b, min_len and stopwords")
+    parser.add_argument("--corpus", "-c", action="append", default=None, help="Only these corpora (domain or stack/<name>); repeatable")
+    parser.add_argument("-k", type=int, default=K, help=f"Cutoff for nDCG and MRR (default: {K})")
+    parser.add_argument("--workers", "-w", type=int, default=None, help="Worker processes (default: CPU count, 1 = in-process)")
+    parser.add_argument("--output", "-o", type=str, default=None, help="Write the full results and recommendations as JSON")
+    args = parser.parse_args(argv)
+
+    corpora = [c for c in labeled_corpora() if not args.corpus or c[0] in args.corpus]
+    if not corpora:
+        print(f"No labeled corpora found in {EVAL_DIR}", file=sys.stderr)
+        return 1
+
+    current = {source: core.corpus_params(core.DATA_DIR / config["file"]) for source, config, _ in corpora}
+    by_file = {str(core.DATA_DIR / config["file"]): current[source] for source, config, _ in corpora}
+    if args.sweep:
+        def settings(filepath):
+            params = by_file[str(filepath)]
+            candidates = [dict(candidate, field_weights=params["field_weights"]) for candidate in grid()]
+            return candidates if params in candidates else candidates + [params]
+    else:
+        def settings(filepath):
+            return [by_file[str(filepath)]]
+
+    results = run(corpora, settings, args.k, args.workers)
+    report = recommend(results, current, args.k)
+    print(format_report(report, args.k))
+
+    if args.output:
+        payload = {"k": args.k, "recommendations": report, "results": results}
+        Path(args.output).write_text(json.dumps(payload, indent=2), encoding='utf-8')
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max FTS - SQLite FTS5 backend for the knowledge base
+
+Usage:
+    python search.py build --fts                      # (re)index every corpus into the database
+    python search.py "glass* dark" --domain style --backend fts
+    python search.py "touch" --domain ux --backend fts --filter Severity=High
+
+Every corpus becomes one FTS5 virtual table in a single SQLite file (default
+.cache/knowledge.fts, or $UIPRO_FTS). Search columns are indexed, every other
+CSV column is stored UNINDEXED so results are read from the same row. Ranking
+is FTS5's built-in bm25() with the corpus' BM25F field weights as column
+weights; FTS5 fixes k1 = 1.2 and b = 0.75.
+
+Queries run in C against the on-disk index, which every process shares through
+the page cache, so no index is ever loaded into Python. A warm in-process
+BM25 index with precomputed weights still answers faster; bench.py measures
+both on the same queries. A table is reindexed on first use when its CSV or settings
+changed since it was written. Query syntax: words are OR-ed, "quoted phrases"
+are required, and a trailing * makes a word a prefix ("glass*"). --filter
+works as with the default backend; typo correction, dense modes and --dedupe
+are only available there.
+
+search() and search_stack() return the same shape as core.search() and
+core.search_stack().
+"""
+
+import json
+import os
+import re
+import sqlite3
+from pathlib import Path
+
+import core
+
+
+# ============ CONFIGURATION ============
+FTS_VERSION = 1
+MIN_PREFIX = 2
+_QUERY = re.compile(r'"([^"]+)"|(\w+)(\*?)')
+
+
+def default_path():
+    """Database location: $UIPRO_FTS or knowledge.fts in the cache dir"""
+    return Path(os.environ.get("UIPRO_FTS") or core.CACHE_DIR / "knowledge.fts")
+
+
+def available():
+    """True when the sqlite3 module was compiled with FTS5"""
+    try:
+        conn = sqlite3.connect(":memory:")
+        try:
+            conn.execute("CREATE VIRTUAL TABLE probe USING fts5(text)")
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return False
+    return True
+
+
+def _table(source):
+    """SQL table name of a corpus ("stack/react-native" -> corpus_stack_react_native)"""
+    return "corpus_" + re.sub(r'\W', '_', source)
+
+
+# ============ DATABASE ============
+_CONNECTIONS = {}
+_PLANS = {}
+
+
+def connect(path=None):
+    """Shared connection to the database, created (and reset on a version change) as needed"""
+    path = Path(path or default_path())
+    conn = _CONNECTIONS.get(path)
+    if conn is None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(path), timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        if conn.execute("PRAGMA user_version").fetchone()[0] != FTS_VERSION:
+            with conn:
+                for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'corpus_%' AND sql LIKE '%VIRTUAL%'").fetchall():
+                    conn.execute(f'DROP TABLE IF EXISTS "{name}"')
+                conn.execute("DROP TABLE IF EXISTS corpora")
+                conn.execute("PRAGMA user_version = %d" % FTS_VERSION)
+        conn.execute("CREATE TABLE IF NOT EXISTS corpora (source TEXT PRIMARY KEY, state TEXT NOT NULL, header TEXT NOT NULL)")
+        _CONNECTIONS[path] = conn
+    return conn
+
+
+def close():
+    """Close every open database connection and forget the prepared plans"""
+    for conn in _CONNECTIONS.values():
+        conn.close()
+    _CONNECTIONS.clear()
+    _PLANS.clear()
+
+
+def _state(filepath, config):
+    """What a corpus table was built from: CSV signature, search columns and BM25 settings"""
+    return json.dumps({
+        "signature": list(core._file_signature(filepath)),
+        "search_cols": config["search_cols"],
+        "params": core.corpus_params(filepath)
+    }, sort_keys=True)
+
+
+def _index_corpus(conn, source, config, filepath, state):
+    """(Re)create the FTS5 table of one corpus from its CSV"""
+    with open(filepath, 'rb') as f:
+        header, rows = core._split_rows(f.read())
+    params = core.corpus_params(filepath)
+    searched = set(config["search_cols"])
+    columns = ", ".join(f"c{pos}" if name in searched else f"c{pos} UNINDEXED" for pos, name in enumerate(header))
+    weights = ", ".join(str(float(params["field_weights"].get(name, 1.0))) if name in searched else "0.0" for name in header)
+    table = _table(source)
+
+    with conn:
+        conn.execute(f'DROP TABLE IF EXISTS "{table}"')
+        conn.execute(f'CREATE VIRTUAL TABLE "{table}" USING fts5({columns}, tokenize = "unicode61 remove_diacritics 2", prefix = "2 3")')
+        placeholders = ", ".join("?" * (len(header) + 1))
+        conn.executemany(
+            f'INSERT INTO "{table}" (rowid, {", ".join(f"c{pos}" for pos in range(len(header)))}) VALUES ({placeholders})',
+            ([idx] + [values[pos] if pos < len(values) else None for pos in range(len(header))] for idx, values in enumerate(rows))
+        )
+        conn.execute(f'INSERT INTO "{table}" ("{table}", rank) VALUES (\'rank\', \'bm25({weights})\')')
+        conn.execute(f'INSERT INTO "{table}" ("{table}") VALUES (\'optimize\')')
+        conn.execute("INSERT OR REPLACE INTO corpora (source, state, header) VALUES (?, ?, ?)",
+                     (source, state, json.dumps(header)))
+    _PLANS.pop((conn, source), None)
+
+
+def _plan(conn, source, config):
+    """Header, tokenizer and CSV signature of a corpus table, reindexing it when its CSV or settings changed
+
+    Plans are memoized per connection; a query re-checks only the CSV signature.
+    """
+    filepath = core.DATA_DIR / config["file"]
+    signature = core._file_signature(filepath)
+    plan = _PLANS.get((conn, source))
+    if plan and plan["signature"] == signature:
+        return plan
+    state = _state(filepath, config)
+    row = conn.execute("SELECT state, header FROM corpora WHERE source = ?", (source,)).fetchone()
+    if row is None or row[0] != state:
+        _index_corpus(conn, source, config, filepath, state)
+        row = conn.execute("SELECT state, header FROM corpora WHERE source = ?", (source,)).fetchone()
+    params = core.corpus_params(filepath)
+    plan = _PLANS[(conn, source)] = {
+        "signature": signature,
+        "header": json.loads(row[1]),
+        "tokenizer": core.tokenizer_for(params["min_len"], params["stopwords"])
+    }
+    return plan
+
+
+def build(path=None):
+    """Index every corpus into the database; returns a summary dict"""
+    conn = connect(path)
+    count = 0
+    for source, config in core.all_corpora():
+        if (core.DATA_DIR / config["file"]).exists():
+            _plan(conn, source, config)
+            count += 1
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    path = Path(path or default_path())
+    return {"path": str(path), "corpora": count, "bytes": path.stat().st_size}
+
+
+# ============ QUERIES ============
+def match_expression(query, tokenizer):
+    """FTS5 MATCH expression for a query, or "" when nothing searchable is left
+
+    Words pass through the corpus tokenizer (minimum length, stopwords) and are
+    OR-ed; quoted phrases are required; a word ending in * is a prefix term.
+    """
+    phrases, terms = [], []
+    for phrase, word, star in _QUERY.findall(query):
+        if phrase:
+            tokens = tokenizer(phrase)
+            if tokens:
+                phrases.append('"' + " ".join(tokens) + '"')
+        elif star:
+            if len(word) >= MIN_PREFIX:
+                terms.append(f'"{word.lower()}"*')
+        else:
+            terms.extend(f'"{token}"' for token in tokenizer(word))
+    terms = list(dict.fromkeys(terms))
+    required = " AND ".join(phrases)
+    if not terms:
+        return required
+    alternatives = " OR ".join(terms)
+    return f"{required} AND ({alternatives})" if required else alternatives
+
+
+def _search_table(source, config, query, max_results, filters, path):
+    """Top rows of one corpus as output dicts, best first"""
+    conn = connect(path)
+    plan = _plan(conn, source, config)
+    header = plan["header"]
+    expression = match_expression(query, plan["tokenizer"])
+    if not expression:
+        return []
+
+    table = _table(source)
+    output = [(name, header.index(name)) for name in config["output_cols"] if name in header]
+    clauses, args = [f'"{table}" MATCH ?'], [expression]
+    for column, values in filters:
+        if column in header:
+            clauses.append(f"lower(trim(c{header.index(column)})) IN ({', '.join('?' * len(values))})")
+            args.extend(values)
+        else:
+            clauses.append("0")
+    select = ", ".join(f"c{pos}" for _, pos in output) or "rowid"
+    sql = f'SELECT {select} FROM "{table}" WHERE {" AND ".join(clauses)} ORDER BY rank LIMIT ?'
+    try:
+        rows = conn.execute(sql, args + [max_results]).fetchall()
+    except sqlite3.OperationalError:
+        return []  # an expression FTS5 cannot parse matches nothing
+    return [{name: values[i] for i, (name, _) in enumerate(output)} for values in rows]
+
+
+def _response(base, results):
+    """Same result envelope as core._response"""
+    base["count"] = len(results)
+    base["results"] = results
+    return base
+
+
+def search(query, domain=None, max_results=core.MAX_RESULTS, filters=None, path=None):
+    """core.search() answered from the FTS5 database"""
+    if domain == "all":
+        return {"error": "The FTS backend searches one corpus at a time; pick a domain or stack", "domain": domain}
+    if domain is None:
+        domain = core.detect_domain(query)
+
+    config = core.CSV_CONFIG.get(domain, core.CSV_CONFIG["style"])
+    filepath = core.DATA_DIR / config["file"]
+
+    if not filepath.exists():
+        return {"error": f"File not found: {filepath}", "domain": domain}
+    try:
+        filters = core.parse_filters(filters, config.get("facet_cols", ()))
+    except ValueError as e:
+        return {"error": str(e), "domain": domain}
+
+    source = next(name for name, entry in core.CSV_CONFIG.items() if entry is config)
+    return _response({
+        "domain": domain,
+        "query": query,
+        "file": config["file"]
+    }, _search_table(source, config, query, max_results, filters, path))
+
+
+def search_stack(query, stack, max_results=core.MAX_RESULTS, filters=None, path=None):
+    """core.search_stack() answered from the FTS5 database"""
+    if stack not in core.STACK_CONFIG:
+        return {"error": f"Unknown stack: {stack}. Available: {', '.join(core.AVAILABLE_STACKS)}"}
+
+    config = dict(core.STACK_CONFIG[stack], **core._STACK_COLS)
+    filepath = core.DATA_DIR / config["file"]
+
+    if not filepath.exists():
+        return {"error": f"Stack file not found: {filepath}", "stack": stack}
+    try:
+        filters = core.parse_filters(filters, config["facet_cols"])
+    except ValueError as e:
+        return {"error": str(e), "stack": stack}
+
+    return _response({
+        "domain": "stack",
+        "stack": stack,
+        "query": query,
+        "file": config["file"]
+    }, _search_table(f"stack/{stack}", config, query, max_results, filters, path))
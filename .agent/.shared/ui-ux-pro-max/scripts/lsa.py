@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max LSA - latent semantic retrieval over the BM25 postings
+
+Each corpus gets a TF-IDF matrix X (rows L2-normalized) built from its BM25
+postings and a rank-k truncated SVD X ~ U S V^T computed by randomized subspace
+iteration. A query vector q is folded in as q V = (X q) U S^-1 and ranked by
+cosine against the document vectors U S, so rows that share no token with the
+query but co-occur with its terms still score: in the product corpus "doctor"
+also finds Veterinary Clinic and Dental Practice, "money" Banking/Traditional
+Finance.
+
+Dense scores blend every query term, so a rare term that matches a single row
+does not dominate as it does under BM25: "car repair" ranks
+Automotive/Car Dealership first, but in "car repair shop admin" the rows about
+shops and admin dashboards outrank it. Hybrid mode keeps the exact-match
+signal and ranks it first. Quoted phrases are ignored in dense mode; in
+hybrid mode every result must contain them, as with BM25.
+
+Pure Python (stdlib only): the corpora have at most a few hundred rows, so the
+SVD takes well under a second and is cached on disk next to the BM25 index.
+"""
+
+import random
+from array import array
+from math import log, sqrt
+from operator import mul
+
+import core
+
+
+# ============ CONFIGURATION ============
+LSA_VERSION = 1
+DIMENSIONS = 32
+OVERSAMPLE = 8
+POWER_ITERATIONS = 2
+HYBRID_ALPHA = 0.5
+SEED = 14
+
+
+# ============ LINEAR ALGEBRA ============
+def _dot(a, b):
+    """Inner product of two equal-length sequences"""
+    return sum(map(mul, a, b))
+
+
+def _orthonormalize(columns):
+    """Modified Gram-Schmidt; columns that collapse to zero are dropped"""
+    basis = []
+    for column in columns:
+        v = list(column)
+        for q in basis:
+            dot = _dot(q, v)
+            v = [a - dot * b for a, b in zip(v, q)]
+        norm = sqrt(_dot(v, v))
+        if norm > 1e-10:
+            basis.append([a / norm for a in v])
+    return basis
+
+
+def _jacobi_eigh(matrix, sweeps=50, tol=1e-20):
+    """Eigenvalues and eigenvectors (as rows) of a small symmetric matrix, by cyclic Jacobi"""
+    n = len(matrix)
+    a = [list(row) for row in matrix]
+    vectors = [[float(i == j) for j in range(n)] for i in range(n)]
+    for _ in range(sweeps):
+        if sum(_dot(row, row) - row[i] * row[i] for i, row in enumerate(a)) < tol:
+            break
+        for p in range(n):
+            for q in range(p + 1, n):
+                apq = a[p][q]
+                if abs(apq) < 1e-300:
+                    continue
+                theta = (a[q][q] - a[p][p]) / (2 * apq)
+                t = (1 if theta >= 0 else -1) / (abs(theta) + sqrt(theta * theta + 1))
+                c = 1 / sqrt(t * t + 1)
+                s = t * c
+                app, aqq = a[p][p], a[q][q]
+                # Rotate rows p and q, then mirror them into columns p and q
+                rp, rq = a[p], a[q]
+                rp, rq = [c * x - s * y for x, y in zip(rp, rq)], [s * x + c * y for x, y in zip(rp, rq)]
+                a[p], a[q] = rp, rq
+                for k, row in enumerate(a):
+                    row[p], row[q] = rp[k], rq[k]
+                rp[p] = app - t * apq
+                rq[q] = aqq + t * apq
+                rp[q] = rq[p] = 0.0
+                vp, vq = vectors[p], vectors[q]
+                vectors[p], vectors[q] = [c * x - s * y for x, y in zip(vp, vq)], [s * x + c * y for x, y in zip(vp, vq)]
+    return [a[i][i] for i in range(n)], vectors
+
+
+# ============ MODEL ============
+class LatentIndex:
+    """Truncated SVD of a corpus' TF-IDF matrix, sharing the BM25 postings
+
+    X[d, t] is tfidf[pos] for the posting pos of term t in document d; U is
+    stored row-major (n_docs x k) in a flat array.
+    """
+
+    def __init__(self, bm25):
+        self.bm25 = bm25
+        self.k = 0
+        self.idf = array('d')
+        self.tfidf = array('d')
+        self.sigma = array('d')
+        self.U = array('d')
+        self.doc_norms = array('d')
+
+    def _rows(self):
+        """(term, [(doc, weight), ...]) for every column of X"""
+        bm25 = self.bm25
+        for tid in range(len(bm25.terms)):
+            start, end = bm25.post_ptr[tid], bm25.post_ptr[tid + 1]
+            yield tid, list(zip(bm25.post_docs[start:end], self.tfidf[start:end]))
+
+    def _times(self, block):
+        """X @ block, with block given as one width-l row per term"""
+        width = len(block[0]) if block else 0
+        out = [[0.0] * width for _ in range(self.bm25.N)]
+        for tid, postings in self._rows():
+            row = block[tid]
+            for doc, w in postings:
+                acc = out[doc]
+                for j in range(width):
+                    acc[j] += w * row[j]
+        return out
+
+    def _times_t(self, block):
+        """X^T @ block, with block given as one width-l row per document"""
+        width = len(block[0]) if block else 0
+        out = []
+        for tid, postings in self._rows():
+            acc = [0.0] * width
+            for doc, w in postings:
+                row = block[doc]
+                for j in range(width):
+                    acc[j] += w * row[j]
+            out.append(acc)
+        return out
+
+    def fit(self, dimensions=DIMENSIONS):
+        """TF-IDF weights from the postings, then a randomized truncated SVD"""
+        bm25 = self.bm25
+        n, m = bm25.N, len(bm25.terms)
+        self.idf = array('d', (log((1 + n) / (1 + bm25.post_ptr[t + 1] - bm25.post_ptr[t])) + 1 for t in range(m)))
+
+        tfidf = array('d', bytes(8 * len(bm25.post_docs)))
+        norms = [0.0] * n
+        for tid in range(m):
+            for pos in range(bm25.post_ptr[tid], bm25.post_ptr[tid + 1]):
+                tfidf[pos] = (1 + log(bm25.post_tfs[pos])) * self.idf[tid]
+                norms[bm25.post_docs[pos]] += tfidf[pos] ** 2
+        for pos, doc in enumerate(bm25.post_docs):
+            tfidf[pos] /= sqrt(norms[doc])
+        self.tfidf = tfidf
+
+        width = min(dimensions + OVERSAMPLE, n, m)
+        if width == 0:
+            return self
+        rng = random.Random(SEED)
+        omega = [[rng.gauss(0, 1) for _ in range(width)] for _ in range(m)]
+
+        # Range finder: Q spans the dominant column space of X
+        q = _orthonormalize(zip(*self._times(omega)))
+        for _ in range(POWER_ITERATIONS):
+            q = _orthonormalize(zip(*self._times(self._times_t(list(zip(*q))))))
+
+        # Small problem: eigendecomposition of B B^T with B = Q^T X
+        z = list(zip(*self._times_t(list(zip(*q)))))
+        width = len(q)
+        gram = [[0.0] * width for _ in range(width)]
+        for i in range(width):
+            for j in range(i, width):
+                gram[i][j] = gram[j][i] = _dot(z[i], z[j])
+        values, vectors = _jacobi_eigh(gram)
+        order = sorted(range(width), key=lambda i: -values[i])
+        top = values[order[0]] if order else 0
+        keep = [i for i in order[:dimensions] if values[i] > 1e-12 * max(top, 1e-300)]
+
+        self.k = len(keep)
+        self.sigma = array('d', (sqrt(values[i]) for i in keep))
+        self.U = array('d', bytes(8 * n * self.k))
+        self.doc_norms = array('d', bytes(8 * n))
+        for doc, basis in enumerate(zip(*q)):
+            base = doc * self.k
+            for j, i in enumerate(keep):
+                self.U[base + j] = _dot(basis, vectors[i])
+            row = [self.U[base + j] * self.sigma[j] for j in range(self.k)]
+            self.doc_norms[doc] = sqrt(_dot(row, row))
+        return self
+
+    def score_many(self, queries, k=None, allowed=None):
+        """Cosine of each query against every document (or only the allowed ones) in the latent space"""
+        bm25 = self.bm25
+        output = []
+        for query in queries:
+            counts = {}
+            for token in bm25.tokenizer(query):
+                tid = bm25.vocab.get(token)
+                if tid is not None:
+                    counts[tid] = counts.get(tid, 0) + 1
+
+            # s = X q, touching only the postings of the query terms
+            s = {}
+            for tid, count in counts.items():
+                weight = (1 + log(count)) * self.idf[tid]
+                for pos in range(bm25.post_ptr[tid], bm25.post_ptr[tid + 1]):
+                    doc = bm25.post_docs[pos]
+                    s[doc] = s.get(doc, 0.0) + weight * self.tfidf[pos]
+
+            # a = U^T s; the folded-in query is a / sigma
+            a = [0.0] * self.k
+            for doc, value in s.items():
+                base = doc * self.k
+                for j in range(self.k):
+                    a[j] += value * self.U[base + j]
+            q_norm = sqrt(sum((a[j] / self.sigma[j]) ** 2 for j in range(self.k)))
+            if q_norm == 0:
+                output.append([])
+                continue
+
+            scores = []
+            for doc in (range(bm25.N) if allowed is None else sorted(allowed)):
+                base = doc * self.k
+                dot = _dot(a, self.U[base:base + self.k])
+                norm = self.doc_norms[doc]
+                scores.append((doc, dot / (q_norm * norm) if norm else 0.0))
+            scores.sort(key=core._rank_key, reverse=True)
+            output.append(scores if k is None else scores[:k])
+        return output
+
+    def to_dict(self):
+        """Serialize the fitted model (the postings stay with the BM25 index)"""
+        return {"k": self.k, "idf": self.idf, "tfidf": self.tfidf, "sigma": self.sigma, "U": self.U, "doc_norms": self.doc_norms}
+
+    @classmethod
+    def from_dict(cls, bm25, data):
+        """Restore a model produced by to_dict() on top of its BM25 index"""
+        model = cls(bm25)
+        model.k = data["k"]
+        model.idf = data["idf"]
+        model.tfidf = data["tfidf"]
+        model.sigma = data["sigma"]
+        model.U = data["U"]
+        model.doc_norms = data["doc_norms"]
+        return model
+
+
+# ============ FUSION ============
+def fuse(lexical, dense, k, alpha=HYBRID_ALPHA):
+    """Hybrid ranking: alpha * max-normalized BM25 + (1 - alpha) * positive cosine"""
+    top = max((score for _, score in lexical), default=0) or 1
+    combined = {doc: alpha * score / top for doc, score in lexical}
+    for doc, score in dense:
+        if score > 0:
+            combined[doc] = combined.get(doc, 0.0) + (1 - alpha) * score
+    ranked = sorted(combined.items(), key=core._rank_key, reverse=True)
+    return ranked if k is None else ranked[:k]
+
+
+def score_many(index, model, queries, k, mode, allowed=None):
+    """Rank a batch of (already corrected) queries with the dense or hybrid mode"""
+    dense = model.score_many(queries, None if mode == "hybrid" else k, allowed)
+    if mode == "dense":
+        return dense
+    lexical = index.bm25.score_many(queries, None, allowed)
+    bm25 = index.bm25
+    fused = []
+    for query, lex, den in zip(queries, lexical, dense):
+        # Dense-only candidates must contain the quoted phrases too, like BM25 hits
+        phrases = bm25.tokenizer.phrases(query)
+        if phrases:
+            den = [(doc, score) for doc, score in den if all(bm25.phrase_match(doc, phrase) for phrase in phrases)]
+        fused.append(fuse(lex, den, k))
+    return fused
+
+
+# ============ MODEL CACHE ============
+_MODELS = {}
+
+
+def load_model(filepath, search_cols):
+    """LatentIndex for a corpus: memoized, else read from the .lsa cache, else fitted and cached"""
+    index = core.load_index(filepath, search_cols)
+    key = (str(filepath), tuple(search_cols))
+    digest = core._INDEXES[key][1]
+    cached = _MODELS.get(key)
+    if cached and cached[0] == digest and cached[1].bm25 is index.bm25:
+        return cached[1]
+
+    path = core._cache_path(filepath, search_cols).with_suffix(".lsa")
+    payload = core._read_cache(path, LSA_VERSION)
+    if payload and payload.get("digest") == digest:
+        model = LatentIndex.from_dict(index.bm25, payload["model"])
+    else:
+        model = LatentIndex(index.bm25).fit()
+        core._write_pickle(path, {"version": LSA_VERSION, "digest": digest, "model": model.to_dict()})
+        core._prune_cache(path)
+
+    _MODELS[key] = (digest, model)
+    return model
+
+
+def build_all():
+    """Fit (or load) the model of every corpus ahead of time; returns how many"""
+    count = 0
+    for _, config in core.all_corpora():
+        filepath = core.DATA_DIR / config["file"]
+        if filepath.exists():
+            load_model(filepath, config["search_cols"])
+            count += 1
+    return count
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Neighbors - precomputed "more like this" lists across corpora
+
+Every row of every corpus (domains and stacks) becomes an L2-normalized TF-IDF
+vector over one shared vocabulary, taken from the BM25 postings of its search
+columns. An offline pass (search.py build --similar, or the first similar()
+call) multiplies the vectors through an inverted index and keeps, for every
+row and every target corpus, the TOP_N most similar rows of that corpus.
+
+The lists are stored CSR-style: the neighbors of global row g in corpus c are
+rows/scores[ptr[g * C + c]:ptr[g * C + c + 1]], so a lookup is two array reads
+and a slice. Pure Python (stdlib only); the table is cached on disk, keyed by
+the content hash of every corpus.
+"""
+
+import heapq
+from array import array
+from collections import defaultdict
+from math import log, sqrt
+
+import core
+
+
+# ============ CONFIGURATION ============
+NEIGHBORS_VERSION = 1
+TOP_N = 10
+
+
+# ============ TABLE ============
+class NeighborTable:
+    """Top-N similar rows per (row, target corpus) pair"""
+
+    def __init__(self, sources, bases):
+        self.sources = list(sources)
+        self.corpus_ids = {source: cid for cid, source in enumerate(self.sources)}
+        self.bases = array('I', bases)
+        self.ptr = array('I', [0])
+        self.rows = array('I')
+        self.scores = array('d')
+
+    @classmethod
+    def build(cls, parts, top_n=TOP_N):
+        """Cosine neighbors between every row of the given (source, CorpusIndex) parts"""
+        bases, corpus_of, total = [], array('H'), 0
+        for cid, (_, index) in enumerate(parts):
+            bases.append(total)
+            corpus_of.extend([cid] * index.bm25.N)
+            total += index.bm25.N
+        table = cls([source for source, _ in parts], bases)
+
+        # Raw term frequencies per global row, keyed by the term string so
+        # that corpora with different vocabularies share one space
+        vectors = [{} for _ in range(total)]
+        for base, (_, index) in zip(bases, parts):
+            bm25 = index.bm25
+            for tid, term in enumerate(bm25.terms):
+                for pos in range(bm25.post_ptr[tid], bm25.post_ptr[tid + 1]):
+                    vectors[base + bm25.post_docs[pos]][term] = bm25.post_tfs[pos]
+
+        df = defaultdict(int)
+        for vector in vectors:
+            for term in vector:
+                df[term] += 1
+        idf = {term: log((1 + total) / (1 + count)) + 1 for term, count in df.items()}
+
+        inverted = defaultdict(list)
+        for g, vector in enumerate(vectors):
+            for term, tf in vector.items():
+                vector[term] = (1 + log(tf)) * idf[term]
+            norm = sqrt(sum(w * w for w in vector.values())) or 1.0
+            for term in vector:
+                vector[term] /= norm
+                inverted[term].append((g, vector[term]))
+
+        n_corpora = len(parts)
+        for g, vector in enumerate(vectors):
+            acc = defaultdict(float)
+            for term, weight in vector.items():
+                for other, other_weight in inverted[term]:
+                    acc[other] += weight * other_weight
+            acc.pop(g, None)
+
+            buckets = [[] for _ in range(n_corpora)]
+            for other, score in acc.items():
+                buckets[corpus_of[other]].append((other, score))
+            for cid, bucket in enumerate(buckets):
+                for other, score in heapq.nlargest(top_n, bucket, key=core._rank_key):
+                    table.rows.append(other - bases[cid])
+                    table.scores.append(score)
+                table.ptr.append(len(table.rows))
+        return table
+
+    def neighbors(self, source, row, target, k):
+        """[(row, similarity)] of the k rows of target most similar to row of source"""
+        slot = (self.bases[self.corpus_ids[source]] + row) * len(self.sources) + self.corpus_ids[target]
+        start = self.ptr[slot]
+        end = min(self.ptr[slot + 1], start + k)
+        return list(zip(self.rows[start:end], self.scores[start:end]))
+
+    def to_dict(self):
+        """Serialize for the cache file"""
+        return {"sources": self.sources, "bases": self.bases, "ptr": self.ptr, "rows": self.rows, "scores": self.scores}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Restore a table produced by to_dict()"""
+        table = cls(data["sources"], data["bases"])
+        table.ptr = data["ptr"]
+        table.rows = data["rows"]
+        table.scores = data["scores"]
+        return table
+
+
+# ============ TABLE CACHE ============
+_TABLE = {}
+
+
+def load_table():
+    """NeighborTable for the current data: memoized per data version, else read from the cache, else built"""
+    version = core.data_version()
+    if _TABLE.get("version") == version:
+        return _TABLE["table"]
+
+    parts = core.load_all()
+    digest = core.corpora_digest(parts)
+    path = core.CACHE_DIR / "neighbors.nbr"
+    payload = core._read_cache(path, NEIGHBORS_VERSION)
+    if payload and payload.get("digest") == digest and payload.get("top_n") == TOP_N:
+        table = NeighborTable.from_dict(payload["table"])
+    else:
+        table = NeighborTable.build([(source, index) for source, _, index in parts])
+        core._write_pickle(path, {"version": NEIGHBORS_VERSION, "digest": digest, "top_n": TOP_N, "table": table.to_dict()})
+
+    _TABLE["version"] = core.data_version()
+    _TABLE["table"] = table
+    return table
+
+
+def build_all():
+    """Build (or load) the neighbor table ahead of time; returns how many corpora it covers"""
+    return len(load_table().sources)
@@ -5,18 +5,91 @@ UI/UX Pro Max Search - BM25 search engine for UI/UX style guides
 Usage: python search.py "<query>" [--domain <domain>] [--stack <stack>] [--max-results 3]
        python search.py "<query>" --design-system [-p "Project Name"]
        python search.py "<query>" --design-system --persist [-p "Project Name"] [--page "dashboard"]
+       python search.py --manifest pages.yaml [--output-dir DIR] [--workers 4]
+       python search.py --batch queries.txt [--domain <domain> | --stack <stack>] > results.ndjson
+       python search.py serve [--socket /path/to.sock] [--watch-interval 1.0]
+       python search.py "<query>" --domain product --mode hybrid
+       python search.py "<query>" --domain ux --filter Severity=High --filter Platform=Mobile,All
+       python search.py "<query>" --domain style --backend fts
+       python search.py build [--output /path/to/knowledge.snap] [--dense] [--fts]
+       python search.py suggest "<prefix>" [--domain style] [-k 8] [--json]
+       python search.py similar <domain> <row> --target <domain> [-n 3] [--json]
 
-Domains: style, prompt, color, chart, landing, product, ux, typography
+Domains: style, prompt, color, chart, landing, product, ux, typography, all (every domain and stack)
 Stacks: html-tailwind, react, nextjs
 
+Phrases: wrap words in double quotes ('"dark mode" oled') to require them
+adjacent and in order; unquoted terms that appear close together rank higher.
+
+Filters (--filter COLUMN=VALUE[,VALUE], repeatable): keep only rows whose
+categorical column holds one of the values (case-insensitive). Values of one
+column are alternatives; different columns must all match. Filterable columns:
+  style: Type | ux, react, web: Category, Platform, Severity
+  typography: Category | icons: Category, Library, Style | stacks: Category, Severity
+
+Near duplicates: --dedupe shows only the best-ranked row of each cluster of
+near-identical rows (python dedup.py prints the clusters).
+
 Persistence (Master + Overrides pattern):
   --persist    Save design system to design-system/MASTER.md
   --page       Also create a page-specific override file in design-system/pages/
+  --manifest   Persist every project and page listed in a JSON file (or YAML,
+               with PyYAML installed):
+               each MASTER.md once, every page override against warm
+               indexes, projects in a process pool when there are many
+               (--workers). Prints a timing summary per page (--json for
+               the raw results). See design_system.load_manifest().
+
+Retrieval modes (--mode):
+  bm25         Exact-token BM25 ranking (default)
+  dense        Latent semantic (LSA) ranking: also finds rows that use related
+               words ("doctor" -> Veterinary Clinic, Dental Practice). Blends
+               all query words, so one rare exact match weighs less than in
+               bm25; quoted phrases are ignored
+  hybrid       BM25 and LSA scores fused; quoted phrases are required
+
+Batch mode:
+  --batch      Read one query per line from FILE ("-" for stdin) and print one JSON result per line
+
+Daemon mode:
+  serve        Load every corpus once and answer queries over a Unix socket.
+               Regular invocations use the daemon when it is running and
+               search in-process otherwise (--no-daemon forces in-process).
+
+Snapshot:
+  build        Compile every CSV into one memory-mapped snapshot (default
+               .cache/knowledge.snap, or $UIPRO_SNAPSHOT). Corpora whose CSV
+               changed after the build are read from the CSV instead.
+               --dense also precomputes the LSA model of every corpus.
+               --similar also precomputes the cross-domain neighbor table.
+               --fts also (re)indexes every corpus into the SQLite FTS5 database.
+
+Backends (--backend):
+  python       In-process BM25 over the cached indexes (default)
+  fts          SQLite FTS5 database shared by every process (.cache/knowledge.fts,
+               or $UIPRO_FTS), ranked by FTS5's bm25(). Supports prefix terms
+               ("glass*") and --filter; no typo correction, --mode or --dedupe.
+               Falls back to python until `build --fts` has created the
+               database. See fts.py.
+
+Autocomplete:
+  suggest      Complete a partially typed name (Style Category, Product Type,
+               Font Pairing Name, Icon Name, ...) or keyword of one domain.
+               Uses the daemon when it is running.
+
+More like this:
+  similar      Rows of --target (a domain or stack/<name>) closest in content
+               to one row, given by 0-based position or name ("Glassmorphism"),
+               from a precomputed TF-IDF neighbor table.
 """
 
 import argparse
-from core import CSV_CONFIG, AVAILABLE_STACKS, MAX_RESULTS, search, search_stack
-from design_system import generate_design_system, persist_design_system
+import os
+import sys
+from core import CSV_CONFIG, AVAILABLE_STACKS, MAX_RESULTS, MAX_SUGGESTIONS, SEARCH_MODES
+
+# Everything else is imported by the branch that needs it: a plain lookup
+# never loads json, the daemon server or the design system generator.
 
 
 def format_output(result):
@@ -25,12 +98,18 @@ def format_output(result):
         return f"Error: {result['error']}"
 
     output = []
-    if result.get("stack"):
+    if result.get("target"):
+        output.append(f"## UI Pro Max Similar Rows")
+        output.append(f"**From:** {result['domain']} row {result['row']} | **Target:** {result['target']}")
+    elif result.get("stack"):
         output.append(f"## UI Pro Max Stack Guidelines")
         output.append(f"**Stack:** {result['stack']} | **Query:** {result['query']}")
     else:
         output.append(f"## UI Pro Max Search Results")
         output.append(f"**Domain:** {result['domain']} | **Query:** {result['query']}")
+    if result.get("corrections"):
+        fixes = ", ".join(f"{typo} -> {term}" for typo, term in result["corrections"].items())
+        output.append(f"**Corrected:** {fixes}")
     output.append(f"**Source:** {result['file']} | **Found:** {result['count']} results\n")
 
     for i, row in enumerate(result['results'], 1):
@@ -45,13 +124,115 @@ def format_output(result):
     return "\n".join(output)
 
 
+def print_json(result, indent=2):
+    """Print one result as JSON"""
+    import json
+    print(json.dumps(result, indent=indent, ensure_ascii=False))
+
+
+def parse_filter_args(values):
+    """{column: [values]} from repeated COLUMN=VALUE[,VALUE] arguments; None if malformed"""
+    filters = {}
+    for item in values or ():
+        column, sep, value = item.partition("=")
+        if not sep or not column.strip() or not value.strip():
+            return None
+        filters.setdefault(column.strip(), []).extend(v.strip() for v in value.split(",") if v.strip())
+    return filters
+
+
+def read_batch(path):
+    """Read non-empty query lines from a file or stdin"""
+    if path == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+    return [line.strip() for line in lines if line.strip()]
+
+
 if __name__ == "__main__":
+    if sys.argv[1:2] == ["serve"]:
+        from daemon import serve
+        serve_parser = argparse.ArgumentParser(prog="search.py serve", description="UI Pro Max Search Daemon")
+        serve_parser.add_argument("--socket", type=str, default=None, help="Unix socket path (default: $UIPRO_SOCKET, else $XDG_RUNTIME_DIR or a private per-user temp dir)")
+        serve_parser.add_argument("--watch-interval", type=float, default=1.0, help="Seconds between data file checks, 0 to disable (default: 1)")
+        serve_args = serve_parser.parse_args(sys.argv[2:])
+        serve(serve_args.socket, serve_args.watch_interval)
+        sys.exit(0)
+
+    if sys.argv[1:2] == ["build"]:
+        from snapshot import build
+        build_parser = argparse.ArgumentParser(prog="search.py build", description="UI Pro Max Snapshot Builder")
+        build_parser.add_argument("--output", "-o", type=str, default=None, help="Snapshot path (default: $UIPRO_SNAPSHOT or .cache/knowledge.snap)")
+        build_parser.add_argument("--dense", action="store_true", help="Also precompute the LSA model of every corpus")
+        build_parser.add_argument("--similar", action="store_true", help="Also precompute the cross-domain neighbor table")
+        build_parser.add_argument("--fts", action="store_true", help="Also index every corpus into the SQLite FTS5 database")
+        build_args = build_parser.parse_args(sys.argv[2:])
+        summary = build(build_args.output)
+        print(f"Wrote {summary['corpora']} corpora ({summary['bytes'] / 1024:.0f} KiB) to {summary['path']}")
+        if build_args.dense:
+            from lsa import build_all
+            print(f"Cached LSA models for {build_all()} corpora")
+        if build_args.similar:
+            import neighbors
+            print(f"Cached neighbor table for {neighbors.build_all()} corpora")
+        if build_args.fts:
+            import fts
+            fts_summary = fts.build()
+            print(f"Indexed {fts_summary['corpora']} corpora ({fts_summary['bytes'] / 1024:.0f} KiB) into {fts_summary['path']}")
+        sys.exit(0)
+
+    if sys.argv[1:2] == ["suggest"]:
+        from daemon import call
+        suggest_parser = argparse.ArgumentParser(prog="search.py suggest", description="UI Pro Max Autocomplete")
+        suggest_parser.add_argument("prefix", help="Partially typed name or keyword")
+        suggest_parser.add_argument("--domain", "-d", choices=list(CSV_CONFIG.keys()), default="style", help="Domain to complete from (default: style)")
+        suggest_parser.add_argument("-k", type=int, default=MAX_SUGGESTIONS, help=f"Max suggestions (default: {MAX_SUGGESTIONS})")
+        suggest_parser.add_argument("--json", action="store_true", help="Output as JSON")
+        suggest_parser.add_argument("--no-daemon", action="store_true", help="Complete in-process even if the daemon is running")
+        suggest_args = suggest_parser.parse_args(sys.argv[2:])
+        result = call("suggest", use_daemon=not suggest_args.no_daemon,
+                      prefix=suggest_args.prefix, domain=suggest_args.domain, k=suggest_args.k)
+        if suggest_args.json:
+            print_json(result)
+        elif "error" in result:
+            print(f"Error: {result['error']}")
+        else:
+            for item in result["suggestions"]:
+                print(f"{item['text']}\t{item['kind']}")
+        sys.exit(0)
+
+    if sys.argv[1:2] == ["similar"]:
+        from daemon import call
+        similar_parser = argparse.ArgumentParser(prog="search.py similar", description="UI Pro Max More Like This")
+        similar_parser.add_argument("domain", help="Domain of the chosen row (e.g. style, stack/react)")
+        similar_parser.add_argument("row", help="0-based data row or name-column value of the chosen row")
+        similar_parser.add_argument("--target", "-t", required=True, help="Domain to find similar rows in")
+        similar_parser.add_argument("--max-results", "-n", type=int, default=MAX_RESULTS, help="Max results (default: 3)")
+        similar_parser.add_argument("--json", action="store_true", help="Output as JSON")
+        similar_parser.add_argument("--no-daemon", action="store_true", help="Look up in-process even if the daemon is running")
+        similar_args = similar_parser.parse_args(sys.argv[2:])
+        result = call("similar", use_daemon=not similar_args.no_daemon, domain=similar_args.domain,
+                      row=similar_args.row, target=similar_args.target, k=similar_args.max_results)
+        if similar_args.json:
+            print_json(result)
+        else:
+            print(format_output(result))
+        sys.exit(0)
+
     parser = argparse.ArgumentParser(description="UI Pro Max Search")
-    parser.add_argument("query", help="Search query")
-    parser.add_argument("--domain", "-d", choices=list(CSV_CONFIG.keys()), help="Search domain")
+    parser.add_argument("query", nargs="?", help="Search query")
+    parser.add_argument("--domain", "-d", choices=list(CSV_CONFIG.keys()) + ["all"], help="Search domain ('all' searches every domain and stack)")
     parser.add_argument("--stack", "-s", choices=AVAILABLE_STACKS, help="Stack-specific search (html-tailwind, react, nextjs)")
     parser.add_argument("--max-results", "-n", type=int, default=MAX_RESULTS, help="Max results (default: 3)")
+    parser.add_argument("--mode", choices=SEARCH_MODES, default="bm25", help="Retrieval mode: bm25 (default), dense (LSA) or hybrid")
+    parser.add_argument("--filter", action="append", default=None, metavar="COLUMN=VALUE", help="Keep rows whose column matches a value (comma-separated alternatives); repeatable")
+    parser.add_argument("--dedupe", action="store_true", help="Show only the best row of each near-duplicate cluster (see dedup.py)")
+    parser.add_argument("--backend", choices=["python", "fts"], default="python", help="Search backend: python (default) or fts (SQLite FTS5)")
     parser.add_argument("--json", action="store_true", help="Output as JSON")
+    parser.add_argument("--batch", type=str, default=None, metavar="FILE", help="Run one query per line from FILE ('-' for stdin), output NDJSON")
+    parser.add_argument("--no-daemon", action="store_true", help="Search in-process even if the daemon is running")
     # Design system generation
     parser.add_argument("--design-system", "-ds", action="store_true", help="Generate complete design system recommendation")
     parser.add_argument("--project-name", "-p", type=str, default=None, help="Project name for design system output")
@@ -60,18 +241,89 @@ if __name__ == "__main__":
     parser.add_argument("--persist", action="store_true", help="Save design system to design-system/MASTER.md (creates hierarchical structure)")
     parser.add_argument("--page", type=str, default=None, help="Create page-specific override file in design-system/pages/")
     parser.add_argument("--output-dir", "-o", type=str, default=None, help="Output directory for persisted files (default: current directory)")
+    parser.add_argument("--manifest", type=str, default=None, metavar="FILE", help="Persist every project and page of a JSON manifest (YAML needs PyYAML)")
+    parser.add_argument("--workers", "-w", type=int, default=None, help="Worker processes for --manifest projects (default: in-process below 32 projects, else CPU count)")
 
     args = parser.parse_args()
+    if args.query is None and not (args.batch or args.manifest):
+        parser.error("a query is required unless --batch or --manifest is given")
+    filters = parse_filter_args(args.filter)
+    if filters is None:
+        parser.error("--filter expects COLUMN=VALUE[,VALUE]")
+    if args.backend == "fts" and (args.mode != "bm25" or args.dedupe or args.design_system or args.manifest):
+        parser.error("--backend fts supports neither --mode, --dedupe, --design-system nor --manifest")
+
+    # Batch queries are read up front so a bad file fails like a bad manifest
+    batch = None
+    if args.batch and not args.manifest:
+        try:
+            batch = read_batch(args.batch)
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+
+    # FTS5 needs sqlite3 support; an unbuilt database falls back to the default backend
+    if args.backend == "fts":
+        import fts
+        if not fts.available():
+            print("Error: this Python's sqlite3 has no FTS5 support; use --backend python")
+            sys.exit(1)
+        if not fts.default_path().exists():
+            print(f"No FTS database at {fts.default_path()} (python search.py build --fts); using the BM25 backend", file=sys.stderr)
+            args.backend = "python"
 
+    # Manifest: every project and page in one run, on warm indexes
+    if args.manifest:
+        from design_system import load_manifest, build_manifest, format_manifest_summary
+        try:
+            manifest = load_manifest(args.manifest)
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        results = build_manifest(manifest, os.path.abspath(args.output_dir) if args.output_dir else None, args.workers)
+        if args.json:
+            print_json(results)
+        else:
+            print(format_manifest_summary(results))
+    # FTS5 backend: SQLite is already shared between processes, so no daemon
+    elif args.backend == "fts":
+        import sqlite3
+        for query in batch if args.batch else [args.query]:
+            try:
+                if args.stack:
+                    result = fts.search_stack(query, args.stack, args.max_results, filters)
+                else:
+                    result = fts.search(query, args.domain, args.max_results, filters)
+            except sqlite3.Error as e:
+                print(f"Error: FTS database {fts.default_path()}: {e}")
+                sys.exit(1)
+            if args.batch:
+                print_json(result, indent=None)
+            elif args.json:
+                print_json(result)
+            else:
+                print(format_output(result))
+    # Batch mode: one index load per domain for the whole file
+    elif args.batch:
+        from core import search_many, search_stack_many
+        if args.stack:
+            results = search_stack_many(batch, args.stack, args.max_results, args.mode, filters, args.dedupe)
+        else:
+            results = search_many(batch, args.domain, args.max_results, args.mode, filters, args.dedupe)
+        for result in results:
+            print_json(result, indent=None)
     # Design system takes priority
-    if args.design_system:
-        result = generate_design_system(
-            args.query, 
-            args.project_name, 
-            args.format,
+    elif args.design_system:
+        from daemon import call
+        result = call(
+            "design_system",
+            use_daemon=not args.no_daemon,
+            query=args.query,
+            project_name=args.project_name,
+            format=args.format,
             persist=args.persist,
             page=args.page,
-            output_dir=args.output_dir
+            output_dir=os.path.abspath(args.output_dir or os.getcwd())
         )
         print(result)
         
@@ -90,17 +342,21 @@ if __name__ == "__main__":
             print("=" * 60)
     # Stack search
     elif args.stack:
-        result = search_stack(args.query, args.stack, args.max_results)
+        from daemon import call
+        result = call("search_stack", use_daemon=not args.no_daemon,
+                      query=args.query, stack=args.stack, max_results=args.max_results, mode=args.mode,
+                      filters=filters, dedupe=args.dedupe)
         if args.json:
-            import json
-            print(json.dumps(result, indent=2, ensure_ascii=False))
+            print_json(result)
         else:
             print(format_output(result))
     # Domain search
     else:
-        result = search(args.query, args.domain, args.max_results)
+        from daemon import call
+        result = call("search", use_daemon=not args.no_daemon,
+                      query=args.query, domain=args.domain, max_results=args.max_results, mode=args.mode,
+                      filters=filters, dedupe=args.dedupe)
         if args.json:
-            import json
-            print(json.dumps(result, indent=2, ensure_ascii=False))
+            print_json(result)
         else:
             print(format_output(result))
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Snapshot - every corpus compiled into one memory-mapped file
+
+Usage:
+    python search.py build [--output /path/to/knowledge.snap]
+
+Layout:
+    MAGIC | version (u32) | TOC length (u64) | pickled TOC | 8-byte aligned sections
+
+The TOC holds per-corpus metadata (CSV signature and hash, header, BM25
+parameters, vocabulary, dictionary-column values). Every large buffer - cell
+blobs, cell offsets, dictionary codes, postings and precomputed BM25 weights -
+is a section that is read through a memoryview of the mapping, so opening the
+snapshot touches only the TOC and concurrent processes share the page cache.
+"""
+
+import mmap
+import os
+import pickle
+import struct
+from array import array
+from collections import namedtuple
+from pathlib import Path
+
+import core
+
+
+# ============ CONFIGURATION ============
+MAGIC = b"UIPROKB\0"
+SNAPSHOT_VERSION = 1
+_PREAMBLE = struct.Struct("<8sIQ")
+
+# A buffer stored outside the TOC: byte offset and length in the file, and
+# the array typecode to view it as (None for raw bytes)
+Span = namedtuple("Span", "offset length typecode")
+
+
+def default_path():
+    """Snapshot location: $UIPRO_SNAPSHOT or knowledge.snap in the cache dir"""
+    return Path(os.environ.get("UIPRO_SNAPSHOT") or core.CACHE_DIR / "knowledge.snap")
+
+
+def corpus_key(filepath, search_cols):
+    """TOC key for a corpus: data-relative file name and its search columns"""
+    try:
+        name = Path(filepath).relative_to(core.DATA_DIR).as_posix()
+    except ValueError:
+        name = str(filepath)
+    return name, tuple(search_cols)
+
+
+# ============ BUILD ============
+class _Writer:
+    """Collects section buffers while the TOC is assembled"""
+
+    def __init__(self):
+        self.chunks = []
+        self.size = 0
+
+    def add(self, buffer):
+        """Append a buffer (8-byte aligned) and return its Span relative to the data area"""
+        typecode = buffer.typecode if isinstance(buffer, array) else None
+        data = buffer.tobytes() if isinstance(buffer, array) else bytes(buffer)
+        span = Span(self.size, len(data), typecode)
+        padding = -len(data) % 8
+        self.chunks.append(data + b"\0" * padding)
+        self.size += len(data) + padding
+        return span
+
+    def externalize(self, value):
+        """Replace arrays and byte strings with Spans, recursing into containers"""
+        if isinstance(value, (array, bytes)):
+            return self.add(value)
+        if isinstance(value, dict):
+            return {k: self.externalize(v) for k, v in value.items()}
+        if isinstance(value, tuple):
+            return tuple(self.externalize(v) for v in value)
+        return value
+
+
+def build(path=None):
+    """Compile every corpus into one snapshot file; returns a summary dict"""
+    path = Path(path or default_path())
+    writer = _Writer()
+    toc = {}
+    for _, config in core.all_corpora():
+        filepath = core.DATA_DIR / config["file"]
+        if not filepath.exists():
+            continue
+        # Always compiled from the CSV itself, never from a previous snapshot
+        signature = core._file_signature(filepath)
+        with open(filepath, 'rb') as f:
+            raw = f.read()
+        digest = core._digest(raw)
+        params = core.corpus_params(filepath)
+        index = core._build_index(raw, config["search_cols"], params)
+        # Per-corpus cache files stay as the fallback; superseded ones are dropped
+        cache = core._cache_path(filepath, config["search_cols"])
+        core._prune_cache(cache)
+        core._prune_cache(cache.with_suffix(".lsa"))
+        bm25 = index.bm25.to_dict()
+        bm25["weights"] = index.bm25.weights()
+        toc[corpus_key(filepath, config["search_cols"])] = {
+            "signature": signature,
+            "params": params,
+            "digest": digest,
+            "header": index.header,
+            "store": writer.externalize(index.store.to_dict()),
+            "bm25": writer.externalize(bm25)
+        }
+
+    head = pickle.dumps({"index_version": core.INDEX_VERSION, "corpora": toc}, protocol=pickle.HIGHEST_PROTOCOL)
+    head += b"\0" * (-(_PREAMBLE.size + len(head)) % 8)
+    import tempfile
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=f"{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(_PREAMBLE.pack(MAGIC, SNAPSHOT_VERSION, len(head)))
+            f.write(head)
+            for chunk in writer.chunks:
+                f.write(chunk)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    return {"path": str(path), "corpora": len(toc), "bytes": _PREAMBLE.size + len(head) + writer.size}
+
+
+# ============ LOAD ============
+class Snapshot:
+    """Read-only view over a mapped snapshot file"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, head_len = _PREAMBLE.unpack_from(self._map, 0)
+        if magic != MAGIC or version != SNAPSHOT_VERSION:
+            self._map.close()
+            raise ValueError(f"Not a version {SNAPSHOT_VERSION} snapshot: {path}")
+        self._base = _PREAMBLE.size + head_len
+        toc = pickle.loads(self._map[_PREAMBLE.size:self._base])
+        if toc.get("index_version") != core.INDEX_VERSION:
+            self._map.close()
+            raise ValueError(f"Snapshot built for another index version: {path}")
+        self.corpora = toc["corpora"]
+        self._view = memoryview(self._map)
+
+    def _resolve(self, value):
+        """Turn Spans back into memoryviews over the mapping"""
+        if isinstance(value, Span):
+            start = self._base + value.offset
+            view = self._view[start:start + value.length]
+            return view.cast(value.typecode) if value.typecode else view
+        if isinstance(value, dict):
+            return {k: self._resolve(v) for k, v in value.items()}
+        if isinstance(value, tuple):
+            return tuple(self._resolve(v) for v in value)
+        return value
+
+    def load(self, filepath, search_cols, signature):
+        """(digest, CorpusIndex) for a corpus, or None if absent or its CSV or settings changed since the build"""
+        entry = self.corpora.get(corpus_key(filepath, search_cols))
+        if entry is None or tuple(entry["signature"]) != tuple(signature):
+            return None
+        if entry.get("params") != core.corpus_params(filepath):
+            return None
+        data = self._resolve(entry["bm25"])
+        bm25 = core.BM25.from_dict(data)
+        bm25._weights = data["weights"]
+        store = core.ColumnStore.from_dict(self._resolve(entry["store"]))
+        return entry["digest"], core.CorpusIndex(entry["header"], store, bm25)
+
+
+def open_snapshot(path=None):
+    """Map the snapshot, or return None if there is no usable one"""
+    try:
+        return Snapshot(path or default_path())
+    except (OSError, ValueError, EOFError, pickle.UnpicklingError, struct.error):
+        return None